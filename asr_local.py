@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - offline Vietnamese speech recognition with wav2vec 2.0
+# https://huggingface.co/nguyenvulebinh/wav2vec2-base-vietnamese-250h
+#
+# Audio is passed in memory (no temp WAV round trip), inference runs under
+# torch.inference_mode() with an explicit CPU thread count, and the model can
+# optionally be dynamically quantized to int8 for faster CPU inference.
+#
+# pip install torch transformers scipy
+
+import os
+
+import numpy as np
+
+from audio_preprocess import to_mono_resampled
+from lazy_import import require
+
+MODEL_NAME = "nguyenvulebinh/wav2vec2-base-vietnamese-250h"
+# wav2vec2 models are trained on 16 kHz audio
+SAMPLE_RATE = 16000
+
+
+class Wav2Vec2Backend:
+    """
+    Local wav2vec2 CTC recognizer.
+
+    Args:
+        model_name (str): Hugging Face model id or local path
+        num_threads (int): CPU threads used by torch (default: all cores)
+        quantize (bool): Use a dynamically int8-quantized copy of the model
+    """
+
+    def __init__(self, model_name=MODEL_NAME, num_threads=None, quantize=False):
+        torch = require("torch", "--local-asr")
+        transformers = require("transformers", "--local-asr")
+        Wav2Vec2Processor, Wav2Vec2ForCTC = transformers.Wav2Vec2Processor, transformers.Wav2Vec2ForCTC
+
+        self.torch = torch
+        self.num_threads = num_threads or os.cpu_count() or 1
+        torch.set_num_threads(self.num_threads)
+
+        self.processor = Wav2Vec2Processor.from_pretrained(model_name)
+        model = Wav2Vec2ForCTC.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.quantized = quantize
+
+    @staticmethod
+    def to_float(samples):
+        """int16 PCM -> float32 in [-1, 1]; float input is passed through."""
+        samples = np.asarray(samples)
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        if samples.dtype == np.int16:
+            return samples.astype(np.float32) / 32768.0
+        return samples.astype(np.float32, copy=False)
+
+    def logits(self, samples):
+        """Run the model on 16 kHz mono samples and return the CTC logits."""
+        inputs = self.processor(self.to_float(samples), sampling_rate=SAMPLE_RATE, return_tensors="pt")
+        with self.torch.inference_mode():
+            return self.model(inputs.input_values).logits
+
+    def transcribe(self, samples, sample_rate=SAMPLE_RATE):
+        """
+        Transcribe audio held in memory.
+
+        Args:
+            samples (np.ndarray): Mono (or multi-channel) int16 or float audio
+            sample_rate (int): Sample rate of samples
+
+        Returns:
+            str: The transcription
+        """
+        if sample_rate != SAMPLE_RATE:
+            samples = to_mono_resampled(samples, sample_rate, SAMPLE_RATE)
+        predicted_ids = self.torch.argmax(self.logits(samples), dim=-1)
+        return self.processor.batch_decode(predicted_ids)[0]
+
+    def transcribe_batch(self, batch):
+        """
+        Transcribe several 16 kHz clips in one padded forward pass.
+
+        Args:
+            batch (list): Mono float32 or int16 arrays; similar lengths keep
+                the padding (and the wasted compute) small
+
+        Returns:
+            list: One transcription per clip
+        """
+        inputs = self.processor(
+            [self.to_float(samples) for samples in batch],
+            sampling_rate=SAMPLE_RATE,
+            padding="longest",
+            return_tensors="pt",
+        )
+        # Only models trained with an attention mask get one from the processor
+        attention_mask = inputs.get("attention_mask")
+        with self.torch.inference_mode():
+            logits = self.model(inputs.input_values, attention_mask=attention_mask).logits
+        predicted_ids = self.torch.argmax(logits, dim=-1)
+        return self.processor.batch_decode(predicted_ids)
+
+    def transcribe_audio_data(self, audio):
+        """Transcribe a speech_recognition AudioData."""
+        raw = audio.get_raw_data(convert_width=2)
+        return self.transcribe(np.frombuffer(raw, dtype=np.int16), audio.sample_rate)
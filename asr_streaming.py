@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - incremental wav2vec2 transcription while the user speaks
+# A background thread runs the model on overlapping windows of the live
+# capture buffer (a vad.RingBuffer at 16 kHz). Frame-level CTC decisions are
+# committed once they have enough right context, so when silence is detected
+# only the last fraction of a second still needs to go through the model.
+
+import threading
+
+import numpy as np
+
+from asr_local import SAMPLE_RATE
+
+# wav2vec2 emits one CTC frame every 20 ms (320 samples at 16 kHz)
+FRAME_STRIDE = 320
+# Receptive field of the convolutional feature encoder
+MIN_WINDOW = 400
+
+
+def ctc_collapse(ids, blank_id):
+    """
+    Collapse repeated CTC labels and drop blanks, vectorized.
+
+    Args:
+        ids (np.ndarray): Frame-level argmax label ids
+        blank_id (int): Id of the CTC blank (the tokenizer's pad token)
+    """
+    ids = np.asarray(ids)
+    if ids.size == 0:
+        return ids
+    keep = np.empty(ids.size, dtype=bool)
+    keep[0] = True
+    np.not_equal(ids[1:], ids[:-1], out=keep[1:])
+    keep &= ids != blank_id
+    return ids[keep]
+
+
+class StreamingTranscriber:
+    """
+    Transcribe a growing capture buffer in overlapping windows.
+
+    Args:
+        backend (asr_local.Wav2Vec2Backend): Loaded model and processor,
+            reused for every window
+        buffer (vad.RingBuffer): Live 16 kHz int16 capture buffer
+        window_seconds (float): Longest window sent to the model at once
+        hop_seconds (float): New audio needed before the next window runs
+        left_context_seconds (float): Already-committed audio re-sent as context
+        right_context_seconds (float): Frames closer than this to the end of
+            the buffer are not committed yet (they lack future context)
+        on_interim (callable): Called with each new interim transcript
+    """
+
+    def __init__(self, backend, buffer, window_seconds=4.0, hop_seconds=0.5,
+                 left_context_seconds=0.5, right_context_seconds=0.5, on_interim=None):
+        self.backend = backend
+        self.buffer = buffer
+        self.window = self._align(window_seconds * SAMPLE_RATE)
+        self.hop = int(hop_seconds * SAMPLE_RATE)
+        self.left_context = self._align(left_context_seconds * SAMPLE_RATE)
+        self.right_context = self._align(right_context_seconds * SAMPLE_RATE)
+        self.on_interim = on_interim
+        self.tokenizer = backend.processor.tokenizer
+        self.blank_id = self.tokenizer.pad_token_id
+
+        self.committed_ids = np.zeros(int(30 * SAMPLE_RATE / FRAME_STRIDE), dtype=np.int64)
+        self.committed = 0
+        self.tentative_ids = self.committed_ids[:0]
+        self.processed_end = 0
+        self.interim = ""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _align(samples):
+        return int(samples) // FRAME_STRIDE * FRAME_STRIDE
+
+    def start(self):
+        """Start transcribing in the background."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.wait(self.hop / SAMPLE_RATE / 2):
+            end = self.buffer.written
+            if end - self.processed_end >= self.hop:
+                with self._lock:
+                    self._process(end, final=False)
+
+    def finish(self, end=None):
+        """
+        Stop the background thread and transcribe the remaining tail.
+
+        Args:
+            end (int): Absolute sample position where the utterance ended
+                (default: everything written so far)
+
+        Returns:
+            str: The final transcript
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._process(self.buffer.written if end is None else end, final=True)
+            return self._decode(self.committed_ids[:self.committed])
+
+    def _process(self, end, final):
+        while True:
+            start = max(self.buffer.start, self.committed * FRAME_STRIDE - self.left_context)
+            start -= start % FRAME_STRIDE
+            stop = min(end, start + self.window)
+            if stop - start < MIN_WINDOW:
+                break
+
+            ids = self._frame_ids(self.buffer.read(start, stop))
+            first_frame = start // FRAME_STRIDE
+            if first_frame > self.committed:
+                # Audio left the ring buffer before it was transcribed
+                self._commit(np.full(first_frame - self.committed, self.blank_id))
+            if final and stop == end:
+                commit_until = first_frame + ids.size
+            else:
+                commit_until = (stop - self.right_context) // FRAME_STRIDE
+            lo = self.committed - first_frame
+            hi = min(ids.size, commit_until - first_frame)
+            if hi > lo:
+                self._commit(ids[lo:hi])
+            self.tentative_ids = ids[max(hi, lo):]
+            self.processed_end = stop
+
+            if stop >= end or hi <= lo:
+                break
+
+        if not final:
+            interim = self._decode(np.concatenate((self.committed_ids[:self.committed], self.tentative_ids)))
+            if interim != self.interim:
+                self.interim = interim
+                if self.on_interim:
+                    self.on_interim(interim)
+
+    def _frame_ids(self, samples):
+        """Frame-level argmax labels for one window."""
+        logits = self.backend.logits(samples)
+        return logits[0].argmax(dim=-1).cpu().numpy()
+
+    def _commit(self, ids):
+        needed = self.committed + ids.size
+        if needed > self.committed_ids.size:
+            grown = np.zeros(max(needed, 2 * self.committed_ids.size), dtype=self.committed_ids.dtype)
+            grown[:self.committed] = self.committed_ids[:self.committed]
+            self.committed_ids = grown
+        self.committed_ids[self.committed:needed] = ids
+        self.committed = needed
+
+    def _decode(self, frame_ids):
+        labels = ctc_collapse(frame_ids, self.blank_id)
+        return self.tokenizer.decode(labels.tolist(), group_tokens=False).strip()
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - audio preprocessing before speech recognition
+# Shared by the Google and the local wav2vec2 paths: leading and trailing
+# silence is trimmed with vectorized frame energies, and the audio is
+# downmixed and resampled to the recognizer's native rate in one pass, so
+# fewer bytes are uploaded and less audio goes through the model.
+#
+# pip install numpy scipy
+
+import numpy as np
+
+from lazy_import import require
+from vad import frame_features
+
+
+def to_mono_resampled(samples, sample_rate, target_rate):
+    """
+    Downmix to mono and resample with one polyphase filter pass.
+
+    Args:
+        samples (np.ndarray): int16 or float audio, shape (n,) or (n, channels)
+        sample_rate (int): Rate of samples
+        target_rate (int): Rate to convert to
+
+    Returns:
+        np.ndarray: Mono int16 audio at target_rate
+    """
+    samples = np.asarray(samples)
+    if samples.dtype != np.int16:
+        samples = np.clip(samples * 32768.0, -32768, 32767)
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    if sample_rate != target_rate:
+        resample_poly = require("scipy.signal", "Resampling audio", package="scipy").resample_poly
+        divisor = np.gcd(int(sample_rate), int(target_rate))
+        samples = resample_poly(samples.astype(np.float32), int(target_rate) // divisor, int(sample_rate) // divisor)
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+def trim_silence(samples, sample_rate, frame_ms=20, energy_ratio=3.0, min_energy=100.0, padding=0.2):
+    """
+    Cut leading and trailing silence.
+
+    The noise level is the 10th percentile of the frame energies; the first
+    and last frames louder than energy_ratio times that level (and at least
+    min_energy) delimit the speech, plus `padding` seconds on each side.
+
+    Args:
+        samples (np.ndarray): Mono int16 audio
+        sample_rate (int): Rate of samples
+        frame_ms (int): Analysis frame length in milliseconds
+        energy_ratio (float): Speech threshold relative to the noise level
+        min_energy (float): Absolute minimum speech energy (RMS)
+        padding (float): Seconds of context kept around the speech
+
+    Returns:
+        tuple: (trimmed samples, seconds removed)
+    """
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(samples) // frame_length
+    if n_frames < 2:
+        return samples, 0.0
+
+    energy, _ = frame_features(samples[:n_frames * frame_length].reshape(n_frames, frame_length))
+    threshold = max(min_energy, float(np.percentile(energy, 10)) * energy_ratio)
+    loud = np.flatnonzero(energy > threshold)
+    if loud.size == 0:
+        # Nothing above the threshold: leave it to the recognizer
+        return samples, 0.0
+
+    pad = int(padding * sample_rate)
+    start = max(0, loud[0] * frame_length - pad)
+    end = min(len(samples), (loud[-1] + 1) * frame_length + pad)
+    return samples[start:end], (len(samples) - (end - start)) / sample_rate
+
+
+def preprocess(samples, sample_rate, target_rate, trim=True, verbose=True):
+    """
+    Downmix, resample and trim audio for a recognizer.
+
+    Args:
+        samples (np.ndarray): int16 or float audio, mono or multi-channel
+        sample_rate (int): Rate of samples
+        target_rate (int): Native rate of the recognizer
+        trim (bool): Whether to trim leading/trailing silence
+        verbose (bool): Print how much audio was removed
+
+    Returns:
+        np.ndarray: Mono int16 audio at target_rate
+    """
+    duration = len(samples) / sample_rate
+    samples = to_mono_resampled(samples, sample_rate, target_rate)
+    removed = 0.0
+    if trim:
+        samples, removed = trim_silence(samples, target_rate)
+    if verbose:
+        print(f"✂️ Audio: {duration:.2f}s -> {len(samples) / target_rate:.2f}s "
+              f"({removed:.2f}s of silence removed, {sample_rate} -> {target_rate} Hz)")
+    return samples
+
+
+def preprocess_audio_data(audio, target_rate, trim=True, verbose=True):
+    """
+    Preprocess a speech_recognition AudioData and return a new AudioData.
+
+    Args:
+        audio (sr.AudioData): Captured audio
+        target_rate (int): Rate to convert to (e.g. 16000 for wav2vec2, or a
+            lower upload rate for Google Speech Recognition)
+    """
+    import speech_recognition as sr
+
+    raw = audio.get_raw_data(convert_width=2)
+    samples = preprocess(np.frombuffer(raw, dtype=np.int16), audio.sample_rate, target_rate, trim=trim, verbose=verbose)
+    return sr.AudioData(samples.tobytes(), target_rate, 2)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - barge-in (full-duplex listening while speaking)
+# While an answer is being spoken, every chunk of the always-open microphone
+# is also fed to a VAD endpointer. As soon as the user starts talking the
+# playback of this session is stopped (one 20 ms chunk plus the minimum
+# speech duration after the onset), and the endpointer keeps recording until
+# the user stops, so the interrupting utterance is captured from its onset.
+
+import threading
+
+import numpy as np
+import speech_recognition as sr
+
+from vad import VADEndpointer
+
+
+class BargeInMonitor:
+    """
+    Detect the user talking over the assistant and capture what they say.
+
+    Use a headset, or raise energy_ratio, if the speakers' own sound is
+    picked up by the microphone and stops the playback.
+
+    Args:
+        microphone (PersistentMicrophone): The open microphone (int16 mono)
+        on_barge_in: Called on the microphone thread when speech starts
+            (e.g. stop the playback)
+        pre_roll (float): Seconds of audio kept from before the speech onset
+        min_speech (float): Speech needed before the playback is stopped
+        energy_ratio (float): Speech must be this many times the noise floor
+        silence_duration (float): Silence that ends the new utterance
+        max_duration (float): Maximum length of the new utterance
+        idle_window (float): Audio kept while nobody talks; the buffer is
+            restarted after this long so long answers stay monitored
+        sample_rate (int): Rate of the microphone; pass it when the
+            microphone is opened lazily (--fast-start) so that creating the
+            monitor does not open it
+    """
+
+    def __init__(self, microphone, on_barge_in=None, pre_roll=0.3, min_speech=0.08,
+                 energy_ratio=4.0, silence_duration=0.8, max_duration=10, idle_window=10.0,
+                 sample_rate=None):
+        self.microphone = microphone
+        self.on_barge_in = on_barge_in
+        self.pre_roll = pre_roll
+        self.max_duration = max_duration
+        self.sample_rate = sample_rate or microphone.sample_rate
+        self.idle_samples = int(idle_window * self.sample_rate)
+        self.endpointer = VADEndpointer(
+            sample_rate=self.sample_rate,
+            max_duration=idle_window + max_duration,
+            silence_duration=silence_duration,
+            min_speech=min_speech,
+            energy_ratio=energy_ratio,
+        )
+        self.reaction_time = None
+        self._armed = False
+        self._lock = threading.Lock()
+
+    @property
+    def triggered(self):
+        """True once the user has started talking during the current answer."""
+        return self._armed and self.endpointer.speech_started.is_set()
+
+    def arm(self):
+        """Start watching the microphone (call before the playback starts)."""
+        with self._lock:
+            if self._armed:
+                return
+            self.endpointer.reset()  # the noise floor is kept across turns
+            self.reaction_time = None
+            self._armed = True
+        self.microphone.add_listener(self._on_audio)
+
+    def disarm(self):
+        """
+        Stop watching after the playback ended on its own. When the user has
+        already barged in, the utterance keeps being recorded for utterance().
+        """
+        if not self.triggered:
+            self._detach()
+
+    def utterance(self, timeout=None):
+        """
+        Wait for the interrupting utterance to end and return it.
+
+        Args:
+            timeout (float): Seconds to wait (default: max_duration)
+
+        Returns:
+            sr.AudioData: The utterance, starting pre_roll seconds before its onset
+        """
+        self.endpointer.wait(self.max_duration if timeout is None else timeout)
+        self._detach()
+        samples = self.endpointer.audio(pre_roll=self.pre_roll)
+        return sr.AudioData(samples.tobytes(), self.sample_rate, 2)
+
+    def _detach(self):
+        self.microphone.remove_listener(self._on_audio)
+        with self._lock:
+            self._armed = False
+
+    def _on_audio(self, buffer):
+        endpointer = self.endpointer
+        started = endpointer.speech_started.is_set()
+        if not started and endpointer.buffer.written >= self.idle_samples:
+            endpointer.reset()
+        endpointer.process(np.frombuffer(buffer, dtype=np.int16))
+        if not started and endpointer.speech_started.is_set():
+            self.reaction_time = (endpointer.buffer.written - endpointer.onset) / endpointer.sample_rate
+            if self.on_barge_in is not None:
+                self.on_barge_in()
+        if endpointer.speech_ended.is_set():
+            self.microphone.remove_listener(self._on_audio)
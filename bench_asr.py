@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - CPU benchmark of the wav2vec2 transcription paths
+# Compares the real-time factor (processing time / audio duration, lower is
+# better) of:
+#   legacy  - the original demo path: temp WAV write + sf.read, autograd on,
+#             gradient checkpointing enabled
+#   fp32    - Wav2Vec2Backend: in memory, inference_mode, explicit threads
+#   int8    - Wav2Vec2Backend with dynamic int8 quantization
+#
+# Usage:
+#   python bench_asr.py [recording.wav] [--runs 5] [--threads 4] [--seconds 5]
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from asr_local import MODEL_NAME, SAMPLE_RATE, Wav2Vec2Backend
+from audio_preprocess import to_mono_resampled
+
+
+def load_audio(path, seconds):
+    """Load a recording, or synthesize a speech-like test signal."""
+    if path:
+        import soundfile as sf
+
+        samples, rate = sf.read(path, dtype="int16")
+        return to_mono_resampled(samples, rate, SAMPLE_RATE).astype(np.float32) / 32768.0
+
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 3 * t))
+    voice = np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t)
+    return (0.3 * envelope * voice).astype(np.float32)
+
+
+def legacy_transcribe(processor, model, samples):
+    """The original demo_auto_vietnamese_voice_transcript.py path."""
+    import soundfile as sf
+    import torch
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        path = f.name
+    try:
+        sf.write(path, samples, SAMPLE_RATE)
+        speech, _ = sf.read(path)
+        input_values = processor(speech, return_tensors="pt", padding="longest").input_values
+        logits = model(input_values).logits
+        predicted_ids = torch.argmax(logits, dim=-1)
+        return processor.batch_decode(predicted_ids)[0]
+    finally:
+        os.remove(path)
+
+
+def measure(name, transcribe, samples, runs):
+    transcribe(samples)  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        transcribe(samples)
+        timings.append(time.perf_counter() - start)
+    duration = len(samples) / SAMPLE_RATE
+    median = statistics.median(timings)
+    print(f"{name:<8} median {median * 1000:8.1f} ms   RTF {median / duration:.3f}")
+    return median / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark wav2vec2 transcription on CPU")
+    parser.add_argument("audio", nargs="?", help="WAV file to transcribe (default: synthetic signal)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per path")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads (default: all cores)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Length of the synthetic signal")
+    args = parser.parse_args()
+
+    samples = load_audio(args.audio, args.seconds)
+    print(f"Audio: {len(samples) / SAMPLE_RATE:.1f}s, model: {MODEL_NAME}")
+
+    fp32 = Wav2Vec2Backend(num_threads=args.threads)
+    print(f"torch threads: {fp32.num_threads}")
+
+    from transformers import Wav2Vec2ForCTC
+
+    legacy_model = Wav2Vec2ForCTC.from_pretrained(MODEL_NAME)
+    legacy_model.gradient_checkpointing_enable()
+    results = {
+        "legacy": measure("legacy", lambda s: legacy_transcribe(fp32.processor, legacy_model, s), samples, args.runs),
+    }
+    del legacy_model
+
+    results["fp32"] = measure("fp32", fp32.transcribe, samples, args.runs)
+    del fp32
+
+    int8 = Wav2Vec2Backend(num_threads=args.threads, quantize=True)
+    results["int8"] = measure("int8", int8.transcribe, samples, args.runs)
+
+    for name in ("fp32", "int8"):
+        print(f"{name} speed-up over legacy: {results['legacy'] / results[name]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - offline end-to-end benchmark
+# Runs the real main() / listen() / think() / speak() code of a main script
+# with every external service replaced by a local stand-in
+# (offline_services.py): Gemini, gTTS, mem0, the microphone, Google speech
+# recognition and mpg123. Each stand-in waits for a configurable latency with
+# jitter, and the microphone replays recorded WAV files in real time, so a
+# change can be measured turn by turn without network, API keys or audio
+# devices. Turn latencies come from the --trace spans of the script.
+#
+# Usage:
+#   python bench_e2e.py [main.py] [--turns 20] [--flags="--pipelined --stream"]
+#                       [--wav recordings/] [--output run.json] [--compare base.json]
+
+import argparse
+import builtins
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from offline_services import (
+    UtteranceLibrary,
+    add_latency_arguments,
+    install_modules,
+    install_mpg123,
+    install_speech_recognition,
+    make_services,
+)
+from tracing import load_stage_durations, summarize
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Flags that need a real audio device or a microphone stream the replay cannot drive
+UNSUPPORTED_FLAGS = ["--persistent-mic", "--barge-in", "--wake-word", "--pcm-player"]
+
+
+def wav_files(paths):
+    """Expand directories to the WAV files they contain."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.wav"))))
+        else:
+            files.append(path)
+    return files
+
+
+def scripted_input(commands):
+    """An input() replacement answering with commands, then 'exit'."""
+    commands = iter(list(commands) + ["exit"])
+
+    def fake_input(prompt=""):
+        return next(commands)
+
+    return fake_input
+
+
+def run_script(script, flags, commands, services, trace_file, verbose=False):
+    """
+    Import a main script in a scratch directory and run its main() on the
+    scripted commands.
+
+    Args:
+        script (str): Path of the main script
+        flags (list): Command-line flags for the script (--trace is added)
+        commands (list): What is typed at each prompt ('' speaks into the microphone)
+        services (dict): Stand-in modules for install_modules()
+        trace_file (str): Where the script writes its trace
+        verbose (bool): Show the script's own output
+    """
+    script = os.path.abspath(script)
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    data_dir = os.path.join(workdir, "gemini_audio_chatbot")
+    os.makedirs(data_dir)
+    shutil.copy(os.path.join(ROOT, "personal_data.json"), data_dir)
+
+    saved = (sys.argv, os.getcwd(), builtins.input)
+    os.environ["TRACE_FILE"] = trace_file
+    os.environ.setdefault("GOOGLE_API_KEY", "offline")
+    os.environ.setdefault("MEM0_API_KEY", "offline")
+    sys.argv = [script, "--trace"] + flags
+    builtins.input = scripted_input(commands)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    install_modules(services["genai"], services["gtts"], services["mem0"])
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    module = None
+    try:
+        os.chdir(workdir)
+        with output:
+            spec = importlib.util.spec_from_file_location("bench_e2e_target", script)
+            target = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(target)
+            module = target
+            module.main()
+    finally:
+        if module is not None:
+            with output:
+                close_script(module)
+        sys.argv, cwd, builtins.input = saved
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def close_script(module):
+    """The cleanup the script does in its __main__ block."""
+    module.kill_audio()
+    memory = getattr(module, "memory", None)
+    if hasattr(memory, "close"):
+        memory.close()
+    session = getattr(module, "gemini_session", None)
+    if session is not None and module.is_loaded(session):
+        session.close()
+
+
+def print_summary(summary, baseline=None):
+    """Print the per-stage table, with the p50/p95 change against a baseline run."""
+    header = f"{'stage':<18}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'Δp50 ms':>10}{'Δp95 ms':>10}"
+    print(header)
+    for name, row in summary.items():
+        line = f"{name:<18}{row['n']:>6}" + "".join(f"{row[p] * 1000:>10.1f}" for p in ("p50", "p95", "p99"))
+        if baseline and name in baseline:
+            line += "".join(f"{(row[p] - baseline[name][p]) * 1000:>+10.1f}" for p in ("p50", "p95"))
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end turn latency benchmark")
+    parser.add_argument("script", nargs="?", default="main.py", help="Main script to run (default: main.py)")
+    parser.add_argument("--flags", default="", help='Flags for the script, e.g. --flags="--pipelined --stream"')
+    parser.add_argument("--turns", type=int, default=10, help="Number of turns")
+    parser.add_argument("--text", action="store_true", help="Type the transcripts instead of speaking them")
+    parser.add_argument("--wav", nargs="*", default=[],
+                        help="WAV files or directories to replay (transcript in a .txt next to each)")
+    add_latency_arguments(parser)
+    parser.add_argument("--mic-speed", type=float, default=1.0,
+                        help="Microphone replay speed (1: real time, 0: as fast as possible)")
+    parser.add_argument("--playback-speed", type=float, default=1.0,
+                        help="Playback speed of the fake mpg123 (1: real time, 0: no waiting)")
+    parser.add_argument("--output", help="Write the summary to this JSON file")
+    parser.add_argument("--compare", help="Summary JSON of an earlier run to compare with")
+    parser.add_argument("--verbose", action="store_true", help="Show the chatbot's output")
+    args = parser.parse_args()
+
+    flags = args.flags.split()
+    for flag in UNSUPPORTED_FLAGS:
+        if flag in flags:
+            parser.error(f"{flag} is not supported by the offline benchmark")
+
+    services = make_services(args)
+    library = UtteranceLibrary(wav_files(args.wav))
+    import speech_recognition as sr
+    install_speech_recognition(sr, library, services["asr"], mic_speed=args.mic_speed)
+    install_mpg123(args.playback_speed)
+
+    if args.text:
+        commands = [library.next(16000)[1] for _ in range(args.turns)]
+    else:
+        commands = [""] * args.turns
+
+    trace_file = os.path.join(tempfile.mkdtemp(prefix="bench_e2e_trace_"), "traces.jsonl")
+    label = f"{args.script} {' '.join(flags)}".strip()
+    print(f"⏱️ {label}: {args.turns} {'text' if args.text else 'voice'} turns...")
+    start = time.perf_counter()
+    run_script(args.script, flags, commands, services, trace_file, verbose=args.verbose)
+    elapsed = time.perf_counter() - start
+
+    stages, _ = load_stage_durations([trace_file]) if os.path.exists(trace_file) else ({}, set())
+    if not stages:
+        print("❌ No traced turns: run with --verbose to see what went wrong.")
+        sys.exit(1)
+    summary = summarize(stages)
+    print(f"{summary['turn']['n']} turns in {elapsed:.1f}s "
+          f"({services['genai'].requests} Gemini, {services['gtts'].requests} gTTS requests)")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["summary"]
+    print_summary(summary, baseline)
+
+    if args.output:
+        result = {"script": args.script, "flags": flags, "config": vars(args), "summary": summary}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"💾 Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
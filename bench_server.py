@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - load test of the multi-session voice server
+# Opens N sessions at once, each sending its turns one after the other, and
+# reports the turns per second and the turn latency (p50/p95/p99) for every
+# concurrency level. Without --url the server runs in-process on the local
+# service stand-ins of offline_services.py (same latency options as
+# bench_e2e.py), so the numbers show the server's own scaling.
+#
+# Usage:
+#   python bench_server.py [--sessions 1 10 100] [--turns 5] [--url http://127.0.0.1:8765]
+#                          [--wav question.wav] [--output load.json]
+
+import argparse
+import asyncio
+import json
+import time
+import urllib.parse
+
+from offline_services import DEFAULT_TRANSCRIPTS, add_latency_arguments, install_modules, make_services
+from tracing import percentile
+
+
+class HttpClient:
+    """Minimal keep-alive HTTP/1.1 client (one connection per session)."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b"", content_type="application/json"):
+        """
+        Returns:
+            tuple: (status, body), the body decoded when it is JSON
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        if isinstance(body, dict):
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers.get("content-length", "0")))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        if headers.get("content-type", "").startswith("application/json") and data:
+            data = json.loads(data.decode("utf-8"))
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def run_session(host, port, index, turns, wav, fetch_audio, latencies, errors):
+    """One user: open a session, send its turns in order, close it."""
+    client = HttpClient(host, port)
+    try:
+        status, data = await client.request("POST", "/sessions", {"user_id": f"load_user_{index}"})
+        if status != 201:
+            errors.append(f"create session: {status}")
+            return
+        session = data["session"]
+        for turn in range(turns):
+            start = time.perf_counter()
+            if wav is not None:
+                status, data = await client.request("POST", f"/sessions/{session}/turns", wav, "audio/wav")
+            else:
+                text = DEFAULT_TRANSCRIPTS[(index + turn) % len(DEFAULT_TRANSCRIPTS)]
+                status, data = await client.request("POST", f"/sessions/{session}/turns", {"text": text})
+            if status == 200 and fetch_audio:
+                status, _ = await client.request("GET", data["audio_url"])
+            if status != 200:
+                errors.append(f"turn: {status} {data}")
+                continue
+            latencies.append(time.perf_counter() - start)
+        await client.request("DELETE", f"/sessions/{session}")
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        errors.append(f"connection: {e}")
+    finally:
+        await client.close()
+
+
+async def run_level(host, port, sessions, turns, wav, fetch_audio):
+    """Run one concurrency level and return its results."""
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        run_session(host, port, i, turns, wav, fetch_audio, latencies, errors) for i in range(sessions)
+    ])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    result = {"sessions": sessions, "turns": len(latencies), "errors": len(errors),
+              "seconds": elapsed, "turns_per_second": len(latencies) / elapsed}
+    for p in (50, 95, 99):
+        result[f"p{p}"] = percentile(latencies, p)
+    if errors:
+        print(f"⚠️ {len(errors)} errors at {sessions} sessions, e.g. {errors[0]}")
+    return result
+
+
+async def benchmark(args):
+    server = None
+    if args.url:
+        url = urllib.parse.urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        services = make_services(args)
+        install_modules(services["genai"], services["gtts"], services["mem0"])
+        if args.wav:
+            import speech_recognition as sr
+            from offline_services import UtteranceLibrary, install_speech_recognition
+            library = UtteranceLibrary()
+            library.next(16000)
+            install_speech_recognition(sr, library, services["asr"])
+        from prompt_builder import build_persona
+        from voice_server import VoiceServer
+
+        persona = build_persona({"name": "Mai", "age": "18", "hometown": "Cần Thơ"})
+        server = await VoiceServer(services["mem0"].MemoryClient(), services["genai"], persona,
+                                   workers=args.workers).start("127.0.0.1", 0)
+        host, port = "127.0.0.1", server.port
+
+    wav = None
+    if args.wav:
+        with open(args.wav, "rb") as f:
+            wav = f.read()
+
+    results = []
+    try:
+        for sessions in args.sessions:
+            print(f"⏱️ {sessions} concurrent sessions × {args.turns} turns...")
+            results.append(await run_level(host, port, sessions, args.turns, wav, args.fetch_audio))
+    finally:
+        if server is not None:
+            await server.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the multi-session voice server")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100],
+                        help="Concurrency levels (default: 1 10 100)")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session")
+    parser.add_argument("--url", help="Test a running server instead of an in-process one")
+    parser.add_argument("--wav", help="Upload this WAV file as every turn (default: text turns)")
+    parser.add_argument("--fetch-audio", action="store_true", help="Also download the reply audio")
+    parser.add_argument("--workers", type=int, default=64, help="Threads of the in-process server")
+    add_latency_arguments(parser)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args))
+
+    print(f"{'sessions':>8}{'turns':>7}{'errors':>8}{'turns/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for row in results:
+        cells = "".join(f"{row[p] * 1000:>10.1f}" if row[p] is not None else f"{'-':>10}"
+                        for p in ("p50", "p95", "p99"))
+        print(f"{row['sessions']:>8}{row['turns']:>7}{row['errors']:>8}{row['turns_per_second']:>9.1f}{cells}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
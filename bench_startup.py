@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - startup benchmark
+# Measures, each in a fresh interpreter:
+#   - the import time of the heavy modules the chatbot depends on
+#   - the time from launching a main script until its "> " prompt appears,
+#     with and without --fast-start
+# Run it before and after a change to see startup regressions. With
+# --budget the exit code is 1 when a --fast-start run is slower than that.
+#
+# Usage:
+#   python bench_startup.py [main.py main_json.py] [--runs 3] [--budget 1.0]
+
+import argparse
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+HEAVY_MODULES = [
+    "google.generativeai",
+    "speech_recognition",
+    "gtts",
+    "mem0",
+    "numpy",
+    "torch",
+    "transformers",
+]
+
+IMPORT_SNIPPET = """
+import importlib, time
+start = time.perf_counter()
+importlib.import_module({name!r})
+print(time.perf_counter() - start)
+"""
+
+
+def import_time(name, runs):
+    """Median import time of a module in fresh interpreters (None if it fails)."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(name=name)],
+            capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            return None
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def time_to_prompt(script, flags, timeout):
+    """
+    Launch a main script and wait for its input prompt.
+
+    Returns:
+        tuple: (seconds, None) or (None, reason it did not get there)
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-u", script] + flags,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    chunks = queue.Queue()
+
+    def read():
+        while True:
+            chunk = proc.stdout.read1(4096)
+            chunks.put(chunk)
+            if not chunk:
+                return
+
+    threading.Thread(target=read, daemon=True).start()
+    output = b""
+    deadline = start + timeout
+    try:
+        while True:
+            try:
+                chunk = chunks.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                return None, f"no prompt after {timeout:.0f}s"
+            if not chunk:
+                lines = output.decode("utf-8", "replace").strip().splitlines()
+                return None, lines[-1] if lines else "exited without output"
+            output += chunk
+            if b"\n> " in output or output.startswith(b"> "):
+                return time.perf_counter() - start, None
+    finally:
+        try:
+            proc.stdin.write(b"exit\n")
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chatbot import and startup time")
+    parser.add_argument("scripts", nargs="*", default=["main.py", "main_json.py"],
+                        help="Main scripts to launch (default: main.py main_json.py)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a prompt")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="Fail if a --fast-start run takes longer than this many seconds")
+    parser.add_argument("--skip-imports", action="store_true", help="Only measure the scripts")
+    args = parser.parse_args()
+
+    if not args.skip_imports:
+        print("Import time (fresh interpreter, median):")
+        for name in HEAVY_MODULES:
+            seconds = import_time(name, args.runs)
+            shown = "not installed" if seconds is None else f"{seconds * 1000:8.1f} ms"
+            print(f"  {name:<22} {shown}")
+
+    print("Time to prompt (median):")
+    over_budget = False
+    for script in args.scripts:
+        if not os.path.exists(script):
+            print(f"  {script}: not found")
+            continue
+        for flags in ([], ["--fast-start"]):
+            timings = []
+            error = None
+            for _ in range(args.runs):
+                seconds, error = time_to_prompt(script, flags, args.timeout)
+                if seconds is None:
+                    break
+                timings.append(seconds)
+            label = f"{script} {' '.join(flags)}".strip()
+            if error:
+                print(f"  {label:<32} failed: {error}")
+                over_budget = over_budget or bool(flags and args.budget is not None)
+                continue
+            median = statistics.median(timings)
+            print(f"  {label:<32} {median * 1000:8.1f} ms")
+            if flags and args.budget is not None and median > args.budget:
+                print(f"  ❌ over the {args.budget:.2f}s budget")
+                over_budget = True
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
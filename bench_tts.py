@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - text-to-speech backend benchmark
+# Synthesizes the same Vietnamese sentences (short to long) with every
+# available backend and reports the synthesis time per character, the time
+# of the first request and, where the audio length is known, the real-time
+# factor (synthesis time / audio duration).
+#
+# Usage:
+#   python bench_tts.py [--backends gtts espeak] [--runs 3] [--text-file replies.txt]
+
+import argparse
+import statistics
+import time
+
+from tts_backends import BACKENDS, get_backend, wav_duration
+
+SENTENCES = [
+    "Dạ, em nghe rồi anh.",
+    "Hôm nay trời Cần Thơ nắng đẹp, anh nhớ uống đủ nước nha.",
+    "Nếu anh cần em nhắc lịch họp chiều nay hay tìm thông tin gì thì cứ nói với em nhé, em luôn sẵn sàng giúp anh.",
+    "Lúc trước anh có nói với em là anh thích màu xanh dương, vì nó làm anh nhớ tới biển Phú Quốc "
+    "và những chuyến đi chơi cùng gia đình hồi còn nhỏ, nên em đoán anh vẫn thích màu đó anh ạ.",
+]
+
+
+def audio_duration(backend, audio):
+    """Seconds of synthesized audio, or None when it cannot be measured."""
+    if backend.extension == ".wav":
+        return wav_duration(audio)
+    try:
+        from tts_pipeline import decode_mp3
+
+        return len(decode_mp3(audio, 24000)) / 24000
+    except ImportError:
+        return None
+
+
+def benchmark(backend, sentences, runs):
+    """
+    Time every sentence runs times (after one warm-up request).
+
+    Returns:
+        dict: first request, ms per character, real-time factor
+    """
+    start = time.perf_counter()
+    backend.synthesize(sentences[0])
+    first = time.perf_counter() - start
+
+    per_char = []
+    factors = []
+    for _ in range(runs):
+        for sentence in sentences:
+            start = time.perf_counter()
+            audio = backend.synthesize(sentence)
+            elapsed = time.perf_counter() - start
+            per_char.append(elapsed / len(sentence))
+            duration = audio_duration(backend, audio)
+            if duration:
+                factors.append(elapsed / duration)
+    return {
+        "first_request": first,
+        "ms_per_char": statistics.median(per_char) * 1000,
+        "ms_per_char_max": max(per_char) * 1000,
+        "real_time_factor": statistics.median(factors) if factors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the synthesis time of the TTS backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), help="Backends to compare")
+    parser.add_argument("--runs", type=int, default=3, help="Runs over the sentences")
+    parser.add_argument("--text-file", help="Sentences to synthesize, one per line")
+    args = parser.parse_args()
+
+    sentences = SENTENCES
+    if args.text_file:
+        with open(args.text_file, "r", encoding="utf-8") as f:
+            sentences = [line.strip() for line in f if line.strip()]
+    total_chars = sum(len(s) for s in sentences)
+    print(f"{len(sentences)} sentences, {total_chars} characters, {args.runs} runs")
+
+    print(f"{'backend':<10}{'first ms':>10}{'ms/char':>10}{'max ms/char':>13}{'RTF':>8}")
+    for name in args.backends:
+        try:
+            result = benchmark(get_backend(name), sentences, args.runs)
+        except Exception as e:
+            print(f"{name:<10}  unavailable: {e}")
+            continue
+        rtf = f"{result['real_time_factor']:>8.3f}" if result["real_time_factor"] is not None else f"{'-':>8}"
+        print(f"{name:<10}{result['first_request'] * 1000:>10.1f}{result['ms_per_char']:>10.2f}"
+              f"{result['ms_per_char_max']:>13.2f}{rtf}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - offline bulk transcription of recorded audio
+# Clips are sorted by length and grouped into padded batches for wav2vec2.
+# A process pool decodes and resamples the next batches while the model runs
+# on the current one, and results are written as JSONL.
+#
+# Usage:
+#   python bulk_transcribe.py calls/ other_call.wav -o transcripts.jsonl
+#   python bulk_transcribe.py @file_list.txt --batch-size 16 --int8
+#
+# pip install torch transformers soundfile scipy
+
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from asr_local import SAMPLE_RATE, Wav2Vec2Backend
+from audio_preprocess import to_mono_resampled
+from lazy_import import require
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3")
+
+
+def collect_files(inputs):
+    """
+    Expand directories (recursively) and @list files into audio file paths.
+
+    Args:
+        inputs (list): Files, directories, or "@list.txt" files with one path per line
+    """
+    files = []
+    for item in inputs:
+        if item.startswith("@"):
+            with open(item[1:], "r", encoding="utf-8") as f:
+                files.extend(collect_files([line.strip() for line in f if line.strip()]))
+        elif os.path.isdir(item):
+            for root, _, names in os.walk(item):
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            files.append(item)
+    return files
+
+
+def clip_duration(path):
+    """Duration from the file header, without decoding the audio."""
+    sf = require("soundfile", "bulk_transcribe.py")
+
+    try:
+        return sf.info(path).duration
+    except Exception:
+        return 0.0
+
+
+def load_clip(path):
+    """Decode a file to 16 kHz mono int16 (runs in a worker process)."""
+    sf = require("soundfile", "bulk_transcribe.py")
+
+    samples, rate = sf.read(path, dtype="int16", always_2d=True)
+    return to_mono_resampled(samples, rate, SAMPLE_RATE)
+
+
+def load_batch(paths):
+    """Decode one batch; failures are returned as exceptions, not raised."""
+    clips = []
+    for path in paths:
+        try:
+            clips.append(load_clip(path))
+        except Exception as e:
+            clips.append(e)
+    return clips
+
+
+def make_batches(files, durations, batch_size, max_batch_seconds):
+    """
+    Group clips of similar length: sort by duration, then cut batches so the
+    padded size (longest clip x batch size) stays under max_batch_seconds.
+    """
+    order = np.argsort(durations, kind="stable")
+    batches = []
+    current = []
+    for index in order:
+        longest = durations[index]  # sorted ascending: the newest clip is the longest
+        if current and (len(current) >= batch_size or longest * (len(current) + 1) > max_batch_seconds):
+            batches.append(current)
+            current = []
+        current.append(files[index])
+    if current:
+        batches.append(current)
+    return batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe directories of recordings with wav2vec2")
+    parser.add_argument("inputs", nargs="+", help="Audio files, directories, or @list.txt files")
+    parser.add_argument("-o", "--output", default="transcripts.jsonl", help="JSONL output file")
+    parser.add_argument("--batch-size", type=int, default=8, help="Maximum clips per batch")
+    parser.add_argument("--max-batch-seconds", type=float, default=240.0, help="Maximum padded audio per batch")
+    parser.add_argument("--workers", type=int, default=2, help="Decoding / resampling worker processes")
+    parser.add_argument("--prefetch", type=int, default=2, help="Batches decoded ahead of the model")
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads (default: all cores)")
+    parser.add_argument("--int8", action="store_true", help="Use the dynamically int8-quantized model")
+    args = parser.parse_args()
+
+    files = collect_files(args.inputs)
+    if not files:
+        print("❌ No audio files found.")
+        sys.exit(1)
+    durations = np.array([clip_duration(path) for path in files])
+    batches = make_batches(files, durations, args.batch_size, args.max_batch_seconds)
+    print(f"🎧 {len(files)} files, {durations.sum() / 3600:.2f} h of audio, {len(batches)} batches")
+
+    backend = Wav2Vec2Backend(num_threads=args.threads, quantize=args.int8)
+
+    audio_seconds = 0.0
+    done = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool, open(args.output, "w", encoding="utf-8") as out:
+        pending = collections.deque()
+        next_batch = 0
+        while pending or next_batch < len(batches):
+            # Keep the workers decoding ahead while the model is busy
+            while next_batch < len(batches) and len(pending) < args.prefetch + 1:
+                pending.append((batches[next_batch], pool.submit(load_batch, batches[next_batch])))
+                next_batch += 1
+
+            paths, future = pending.popleft()
+            clips = future.result()
+            ok = [(path, clip) for path, clip in zip(paths, clips) if not isinstance(clip, Exception)]
+            for path, clip in zip(paths, clips):
+                if isinstance(clip, Exception):
+                    out.write(json.dumps({"file": path, "error": str(clip)}, ensure_ascii=False) + "\n")
+
+            if ok:
+                texts = backend.transcribe_batch([clip for _, clip in ok])
+                for (path, clip), text in zip(ok, texts):
+                    seconds = len(clip) / SAMPLE_RATE
+                    audio_seconds += seconds
+                    out.write(json.dumps({"file": path, "duration": round(seconds, 3), "text": text}, ensure_ascii=False) + "\n")
+            out.flush()
+
+            done += len(paths)
+            elapsed = time.perf_counter() - started
+            print(f"  {done}/{len(files)} files, {audio_seconds / max(elapsed, 1e-9):.1f} audio-s/s", end="\r")
+
+    elapsed = time.perf_counter() - started
+    print()
+    print(f"✅ Transcribed {audio_seconds:.1f}s of audio in {elapsed:.1f}s "
+          f"({audio_seconds / max(elapsed, 1e-9):.1f} audio-seconds per wall-second) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - append-only JSONL chat history
+# Each turn is appended as one JSON line instead of rewriting the whole
+# history file, the last N turns are read by scanning backwards from the end
+# of the file (older turns are never parsed), and the file is compacted to
+# its recent tail once it grows past a size limit. Per-turn disk I/O stays
+# constant however long the conversation gets.
+
+import json
+import os
+import tempfile
+
+
+class ChatLog:
+    """
+    Chat history window backed by an append-only JSONL log.
+
+    Args:
+        path (str): The JSONL log file
+        max_turns (int): Turns kept in the window (None: no turn limit)
+        max_chars (int): Characters kept in the window (None: no size limit)
+        compact_bytes (int): Compact the log once it is larger than this
+        keep_turns (int): Turns kept by compaction (at least the window)
+        legacy_path (str): Old chat_history.json to import on first use
+    """
+
+    def __init__(self, path="chat_history.jsonl", max_turns=3, max_chars=None,
+                 compact_bytes=1024 * 1024, keep_turns=100, legacy_path=None):
+        self.path = path
+        self.max_turns = max_turns
+        self.max_chars = max_chars
+        self.compact_bytes = compact_bytes
+        self.keep_turns = max(keep_turns, max_turns or 0)
+        if legacy_path and not os.path.exists(path) and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+        self.window = self._trim(self.tail(self._read_limit()))
+
+    @staticmethod
+    def turn_chars(turn):
+        return len(turn.get("user", "")) + len(turn.get("gemini", ""))
+
+    def _read_limit(self):
+        # With only a character budget, a turn holds at least one character
+        if self.max_turns is not None:
+            return self.max_turns
+        return self.max_chars if self.max_chars is not None else self.keep_turns
+
+    def _trim(self, turns):
+        """Apply the turn and character limits, keeping the newest turns."""
+        if self.max_turns is not None:
+            turns = turns[-self.max_turns:] if self.max_turns else []
+        if self.max_chars is not None:
+            total = 0
+            start = len(turns)
+            while start > 0 and total + self.turn_chars(turns[start - 1]) <= self.max_chars:
+                start -= 1
+                total += self.turn_chars(turns[start])
+            turns = turns[start:]
+        return list(turns)
+
+    def tail(self, n, block_size=8192):
+        """
+        Read the last n turns, scanning backwards from the end of the file.
+
+        Args:
+            n (int): Number of turns to read
+            block_size (int): Bytes read per step
+        """
+        if n <= 0 or not os.path.exists(self.path):
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            # n complete lines need n + 1 newlines (or the start of the file)
+            while position > 0 and data.count(b"\n") <= n:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+
+        lines = data.splitlines()
+        if position > 0:
+            lines = lines[1:]  # the first line may be cut in half
+        turns = []
+        for line in lines[-n:]:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                turns.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # a torn write from a crash: skip it
+        return turns
+
+    def append(self, user, gemini):
+        """Append one turn to the log and to the window."""
+        turn = {"user": user, "gemini": gemini}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(turn, ensure_ascii=False) + "\n")
+            size = f.tell()
+        self.window = self._trim(self.window + [turn])
+        if size > self.compact_bytes:
+            self.compact()
+
+    def compact(self):
+        """Atomically rewrite the log with only its last keep_turns turns."""
+        turns = self.tail(self.keep_turns)
+        self._write_all(turns)
+
+    def _write_all(self, turns):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for turn in turns:
+                    f.write(json.dumps(turn, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _import_legacy(self, legacy_path):
+        """Convert the old JSON array file into the JSONL log."""
+        try:
+            with open(legacy_path, "r", encoding="utf-8") as f:
+                turns = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(turns, list):
+            self._write_all([t for t in turns if isinstance(t, dict)][-self.keep_turns:])
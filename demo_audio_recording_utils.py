@@ -4,12 +4,20 @@
 # poetry run pip install numpy==1.26.4
 
 # poetry add sounddevice scipy pydub
+# poetry add soundfile  # StreamingRecorder (WAV/FLAC written while recording)
+
+import os
+import queue
+import threading
+import time
 
 import sounddevice as sd
 from scipy.io.wavfile import write
 import numpy as np
 import pydub
 
+from lazy_import import require
+
 def record_and_save_audio(filename="output.wav", duration=5, sample_rate=14400):
     """
     Records audio from the microphone and saves it to a WAV file.
@@ -65,8 +73,182 @@ def record_and_save_mp3(filename="output.mp3", duration=5, sample_rate=14400):
     print(f"Recording saved to {filename}")
 
 
+class StreamingRecorder:
+    """
+    Records audio from the microphone to WAV or FLAC files in constant memory.
+
+    The audio callback only copies each block into a bounded queue, and a
+    writer thread encodes the blocks to the file as they arrive, so memory use
+    does not grow with the recording length. With segment_seconds the
+    recording is split into files of that length (name_000.wav,
+    name_001.wav, ..., or filename.format(index=i) when the name contains
+    "{index"). If the disk falls behind for longer than the queue holds,
+    blocks are dropped (counted in dropped_blocks) rather than stalling the
+    audio callback. Requires `soundfile`.
+
+    Args:
+        filename (str): Output file; the format comes from the extension (.wav or .flac)
+        sample_rate (int): The sample rate of the recording
+        channels (int): Number of channels
+        segment_seconds (float): Length of each segment file (None: one file)
+        block_duration (float): Seconds of audio per callback block
+        max_queue_seconds (float): Audio that may wait for the writer thread
+        subtype (str): soundfile sample format, e.g. "PCM_16" or "PCM_24"
+        device: Input device (default: system default)
+    """
+
+    def __init__(self, filename="recording.wav", sample_rate=16000, channels=1, segment_seconds=None,
+                 block_duration=0.1, max_queue_seconds=10.0, subtype="PCM_16", device=None):
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.segment_frames = int(segment_seconds * sample_rate) if segment_seconds else None
+        self.block_size = max(1, int(block_duration * sample_rate))
+        self.subtype = subtype
+        self.device = device
+        self.files = []
+        self.frames = 0
+        self.dropped_blocks = 0
+        self.overflows = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=max(1, int(max_queue_seconds / block_duration)))
+        self._stream = None
+        self._writer = None
+        self._sf = None
+
+    def segment_path(self, index):
+        """File name of segment number index."""
+        if self.segment_frames is None:
+            return self.filename
+        if "{index" in self.filename:
+            return self.filename.format(index=index)
+        base, extension = os.path.splitext(self.filename)
+        return f"{base}_{index:03d}{extension}"
+
+    def start(self):
+        """Open the input stream and start writing."""
+        # Fail here, not on the writer thread, when soundfile is missing
+        self._sf = require("soundfile", "StreamingRecorder")
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=self.channels,
+            dtype="int16",
+            blocksize=self.block_size,
+            device=self.device,
+            callback=self._callback,
+        )
+        self._stream.start()
+        return self
+
+    def stop(self):
+        """Stop recording and wait until every queued block has been written."""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if self._writer is not None:
+            # Never block on a full queue: the writer may have stopped reading
+            while self._writer.is_alive():
+                try:
+                    self._queue.put(None, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            self._writer.join()
+            self._writer = None
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def duration(self):
+        """Seconds written so far."""
+        return self.frames / self.sample_rate
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            # Input overflow: the device dropped samples before this block
+            self.overflows += 1
+        try:
+            self._queue.put_nowait(indata.copy())
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    def _write_loop(self):
+        sf = self._sf
+        output = None
+        written = 0
+        try:
+            while True:
+                block = self._queue.get()
+                if block is None:
+                    break
+                while len(block):
+                    if output is None:
+                        path = self.segment_path(len(self.files))
+                        output = sf.SoundFile(path, mode="w", samplerate=self.sample_rate,
+                                              channels=self.channels, subtype=self.subtype)
+                        self.files.append(path)
+                        written = 0
+                    take = len(block)
+                    if self.segment_frames is not None:
+                        take = min(take, self.segment_frames - written)
+                    output.write(block[:take])
+                    written += take
+                    self.frames += take
+                    block = block[take:]
+                    if self.segment_frames is not None and written >= self.segment_frames:
+                        output.close()
+                        output = None
+        except Exception as e:
+            self.error = e
+            # Keep draining so the audio callback never finds the queue full for good
+            while self._queue.get() is not None:
+                pass
+        finally:
+            if output is not None:
+                output.close()
+
+
+def record_stream(filename="recording.wav", duration=None, sample_rate=16000, segment_seconds=None):
+    """
+    Records audio from the microphone straight to WAV/FLAC file(s) in constant
+    memory, for long captures such as meetings.
+
+    Args:
+        filename (str): The output file (.wav or .flac).
+        duration (float): The recording duration in seconds (None: until Ctrl+C).
+        sample_rate (int): The sample rate of the recording.
+        segment_seconds (float): Split the recording into files of this length.
+
+    Returns:
+        list: The files written.
+    """
+    print(f"Recording {'until Ctrl+C' if duration is None else f'for {duration} seconds'}...")
+    recorder = StreamingRecorder(filename, sample_rate=sample_rate, segment_seconds=segment_seconds)
+    with recorder:
+        try:
+            start = time.monotonic()
+            while duration is None or time.monotonic() - start < duration:
+                time.sleep(0.1)
+        except KeyboardInterrupt:
+            pass
+    dropped = f", {recorder.dropped_blocks} blocks dropped" if recorder.dropped_blocks else ""
+    print(f"Recorded {recorder.duration:.1f}s to {', '.join(recorder.files)}{dropped}")
+    return recorder.files
+
+
 if __name__ == "__main__":
     # Example usage: record 10 seconds of audio and save to "my_recording.wav"
     record_and_save_audio("my_recording.wav", duration=3)
     # Example usage: record 10 seconds of audio and save to "my_recording.mp3"
     # record_and_save_mp3("my_recording.mp3", duration=10)
+    # Example usage: record a long meeting to FLAC files of 10 minutes each, until Ctrl+C
+    # record_stream("meeting.flac", segment_seconds=600)
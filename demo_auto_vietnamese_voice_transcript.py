@@ -12,58 +12,59 @@
 import sounddevice as sd
 import numpy as np
 from scipy.io.wavfile import write
-import torch
-from transformers import Wav2Vec2Processor, Wav2Vec2ForCTC
 import os
 import sys
 import threading
 import time
 import soundfile as sf
+from vad import VADEndpointer
+from asr_local import Wav2Vec2Backend, SAMPLE_RATE
+from asr_streaming import StreamingTranscriber
+from audio_preprocess import preprocess
+from lazy_import import make_object, warm_up
 
 # load model and tokenizer
-# Using a smaller sampling rate as in demo_audio_transcript.py
-processor = Wav2Vec2Processor.from_pretrained("nguyenvulebinh/wav2vec2-base-vietnamese-250h", sampling_rate=14400)
-model = Wav2Vec2ForCTC.from_pretrained("nguyenvulebinh/wav2vec2-base-vietnamese-250h")
-model.gradient_checkpointing_enable()
-
-def transcribe_audio(audio_file_path):
+# Inference only: no autograd and no gradient checkpointing, explicit CPU threads,
+# optional dynamic int8 quantization (--int8)
+# With --fast-start the model is loaded in the background (see __main__)
+# instead of before anything else can happen
+FAST_START = "--fast-start" in sys.argv
+backend = make_object(lambda: Wav2Vec2Backend(
+    num_threads=int(os.getenv("ASR_THREADS", "0")) or None,
+    quantize="--int8" in sys.argv,
+), lazy=FAST_START, name="Wav2Vec2Backend")
+
+def transcribe_audio(audio, sample_rate=SAMPLE_RATE):
     """
-    Transcribes the audio file using the loaded Wav2Vec2 model.
+    Transcribes the audio using the loaded Wav2Vec2 model.
+
+    Args:
+        audio: Path of an audio file, or the samples themselves (kept in memory)
+        sample_rate (int): The sample rate of the samples (ignored for files)
     """
     try:
-        # define function to read in sound file
-        def map_to_array(batch):
-            speech, _ = sf.read(batch["file"])
-            batch["speech"] = speech
-            return batch
-
-        # load dummy dataset and read soundfiles
-        ds = map_to_array({
-            "file": audio_file_path
-        })
-
-        # tokenize
-        input_values = processor(ds["speech"], return_tensors="pt", padding="longest").input_values  # Batch size 1
-
-        # retrieve logits
-        logits = model(input_values).logits
-
-        # take argmax and decode
-        predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = processor.batch_decode(predicted_ids)
-        return transcription[0] # Return the first transcription in the batch
+        if isinstance(audio, str):
+            audio, sample_rate = sf.read(audio, dtype="int16")
+        # Trim leading/trailing silence and convert to the model's 16 kHz
+        audio = preprocess(audio, sample_rate, SAMPLE_RATE)
+        return backend.transcribe(audio, SAMPLE_RATE)
     except Exception as e:
         print(f"Error during transcription: {e}")
         return None
 
-def record_audio_until_silence(filename="temp_recording.wav", sample_rate=14400, silence_threshold=500, silence_duration=2, max_duration=10):
+def record_audio_until_silence(filename=None, sample_rate=SAMPLE_RATE, silence_threshold=500, silence_duration=2, max_duration=10):
     """
     Records audio from the microphone and stops after a period of silence or max duration.
 
+    Audio is written into a preallocated ring buffer by the stream callback and
+    classified frame by frame by the VAD endpointer (adaptive noise floor), which
+    signals the end of speech through an event.
+
     Args:
-        filename (str): The name of the output WAV file.
+        filename (str): The name of the output WAV file. If None, the recorded
+            samples are returned instead of being written to disk.
         sample_rate (int): The sample rate of the recording.
-        silence_threshold (int): The amplitude threshold below which audio is considered silent.
+        silence_threshold (int): The amplitude threshold below which audio is considered silent; the adaptive threshold never goes lower.
         silence_duration (int): The duration of silence in seconds to stop recording.
         max_duration (int): The maximum recording duration in seconds.
     """
@@ -72,9 +73,12 @@ def record_audio_until_silence(filename="temp_recording.wav", sample_rate=14400,
 
     print("Recording... Press Ctrl+C to stop manually.")
 
-    audio_data = []
-    silent_frames = 0
-    frames_per_second = sample_rate
+    endpointer = VADEndpointer(
+        sample_rate=sample_rate,
+        max_duration=max_duration,
+        silence_duration=silence_duration,
+        min_energy=silence_threshold / 4,  # Peak amplitude -> frame RMS energy
+    )
     start_time = time.time()
 
     # Flag to signal the timer thread to stop
@@ -97,28 +101,17 @@ def record_audio_until_silence(filename="temp_recording.wav", sample_rate=14400,
 
 
     def callback(indata, frames, time, status):
-        nonlocal audio_data, silent_frames
         if status:
             print(status, file=sys.stderr)
-        audio_data.append(indata.copy())
-
-        # Simple silence detection: check if the maximum amplitude in the frame is below the threshold
-        if np.abs(indata).max() < silence_threshold:
-            silent_frames += frames
-        else:
-            silent_frames = 0 # Reset silent frames if sound is detected
+        endpointer.process(indata[:, 0])
 
     try:
         with sd.InputStream(samplerate=sample_rate, channels=1, dtype=np.int16, callback=callback):
-            while True:
-                elapsed_time = time.time() - start_time
-                # Check for silence duration or max duration
-                if silent_frames >= silence_duration * frames_per_second or elapsed_time >= max_duration:
-                    if elapsed_time >= max_duration:
-                        print("\nMaximum recording duration reached.")
-                    print("Stopping recording.")
-                    break
-                time.sleep(0.05) # Small delay to avoid busy waiting
+            # Wall-clock guard in case the stream stops delivering audio
+            endpointer.wait(timeout=max_duration + 1)
+            if endpointer.end_reason in (None, "max_duration"):
+                print("\nMaximum recording duration reached.")
+            print("Stopping recording.")
 
     except KeyboardInterrupt:
         print("\nRecording stopped manually with Ctrl+C.")
@@ -130,9 +123,10 @@ def record_audio_until_silence(filename="temp_recording.wav", sample_rate=14400,
         timer_thread.join(timeout=0.5) # Join with a timeout
 
 
-    if audio_data:
-        # Concatenate recorded data
-        recorded_audio = np.concatenate(audio_data, axis=0)
+    recorded_audio = endpointer.audio()
+    if len(recorded_audio) and filename is None:
+        return recorded_audio
+    elif len(recorded_audio):
         write(filename, sample_rate, recorded_audio)
         print(f"Recording saved to {filename}")
         return filename
@@ -140,21 +134,84 @@ def record_audio_until_silence(filename="temp_recording.wav", sample_rate=14400,
         print("No audio recorded.")
         return None
 
+def record_and_transcribe_streaming(silence_duration=1, max_duration=10):
+    """
+    Records audio until silence while transcribing it in overlapping windows,
+    printing interim transcripts. Only the last fraction of a second is left
+    to transcribe when the silence is detected.
+
+    Args:
+        silence_duration (int): The duration of silence in seconds to stop recording.
+        max_duration (int): The maximum recording duration in seconds.
+
+    Returns:
+        str: The final transcription, or None if nothing was recorded
+    """
+    print("Press Enter to start recording...")
+    input() # Wait for Enter key press
+
+    print("Recording... Press Ctrl+C to stop manually.")
+
+    # The model runs at 16 kHz, so record at 16 kHz and skip resampling
+    endpointer = VADEndpointer(sample_rate=SAMPLE_RATE, max_duration=max_duration, silence_duration=silence_duration)
+    transcriber = StreamingTranscriber(
+        backend,
+        endpointer.buffer,
+        on_interim=lambda text: print(f"\033[90m… {text}\033[0m", end='\r'),
+    )
+
+    def callback(indata, frames, time, status):
+        if status:
+            print(status, file=sys.stderr)
+        endpointer.process(indata[:, 0])
+
+    try:
+        with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype=np.int16, callback=callback):
+            transcriber.start()
+            endpointer.wait(timeout=max_duration + 1)
+        print("\nStopping recording.")
+    except KeyboardInterrupt:
+        print("\nRecording stopped manually with Ctrl+C.")
+    except Exception as e:
+        print(f"\nAn error occurred during recording: {e}")
+
+    if endpointer.buffer.written == 0:
+        print("No audio recorded.")
+        return None
+    started = time.time()
+    transcription = transcriber.finish(endpointer.end)
+    print(f"Final transcript ready {time.time() - started:.2f}s after the end of speech.")
+    return transcription
+
 if __name__ == "__main__":
-    temp_audio_file = "temp_recording.wav"
+    # Load the model while the user gets ready to speak
+    if FAST_START:
+        warm_up(backend)
+
+    if "--streaming" in sys.argv:
+        # Transcribe while recording
+        while True:
+            transcription = record_and_transcribe_streaming()
+            if transcription:
+                print("Transcription: \033[92m" + transcription + "\033[0m")
+            print("\nPress Enter to record again, or any other key to exit.")
+            if input() != "":
+                break
+        print("Exiting.")
+        sys.exit(0)
+
+    # Record at the model's native 16 kHz, so no resampling is needed
+    sample_rate = SAMPLE_RATE
     while True:
-        recorded_file = record_audio_until_silence(temp_audio_file)
+        # Keep the recording in memory: no temporary WAV file to write and read back
+        recorded_audio = record_audio_until_silence(sample_rate=sample_rate)
 
-        if recorded_file and os.path.exists(recorded_file):
+        if recorded_audio is not None:
             print("Transcribing...")
-            transcription = transcribe_audio(recorded_file)
+            transcription = transcribe_audio(recorded_audio, sample_rate)
             if transcription:
                 # Use ANSI escape codes for green color
                 print("Transcription: \033[92m" + transcription + "\033[0m")
-
-            # Clean up the temporary file
-            os.remove(recorded_file)
-            print(f"Removed temporary file: {recorded_file}")
         else:
             print("Could not transcribe.")
 
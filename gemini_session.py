@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - long-lived Gemini session with a cached persona prefix
+# One GenerativeModel is created per process and one ChatSession per user.
+# The static persona is uploaded once as cached content when it is large
+# enough for explicit context caching. Otherwise it becomes the model's
+# system instruction, which is sent with every request. Each request also
+# carries the retained history (the last few exchanges, with the per-turn
+# memories left out) plus the new message.
+
+from prompt_builder import estimate_tokens
+
+DEFAULT_MODEL = 'models/gemini-2.5-flash-preview-04-17'
+
+# Smallest prompt the API accepts as cached content (Gemini 2.5 Flash)
+MIN_CACHE_TOKENS = 1024
+
+
+def content_text(content):
+    """Text of a history entry: a {"role", "parts"} dict or a Content object."""
+    parts = content["parts"] if isinstance(content, dict) else content.parts
+    return "".join(part if isinstance(part, str) else getattr(part, "text", "") for part in parts)
+
+
+class GeminiSession:
+    """
+    Reusable Gemini model and per-user chat sessions.
+
+    Args:
+        persona (str): Static system prompt shared by every turn
+        model_name (str): Gemini model to use
+        genai_module: The `google.generativeai` module, or a local stub of it
+        max_history_turns (int): Previous turns kept in each chat session
+        cache_ttl (str): Lifetime of the cached persona, e.g. "3600s"
+        min_cache_tokens (int): Below this estimated size the persona is not
+            offered for caching (the request could only fail)
+    """
+
+    def __init__(self, persona, model_name=DEFAULT_MODEL, genai_module=None, max_history_turns=3,
+                 cache_ttl="3600s", min_cache_tokens=MIN_CACHE_TOKENS):
+        if genai_module is None:
+            import google.generativeai as genai_module
+        self.genai = genai_module
+        self.persona = persona
+        self.model_name = model_name
+        self.max_history_turns = max_history_turns
+        self.cache_ttl = cache_ttl
+        self.min_cache_tokens = min_cache_tokens
+        self.cached_content = None
+        self.chats = {}
+        self.requests = 0
+        self.request_chars = 0
+        self._pending = {}
+        self.model = self._create_model()
+
+    def _create_model(self):
+        """Create the model once, with the persona cached if possible."""
+        tokens = estimate_tokens(self.persona)
+        if tokens < self.min_cache_tokens:
+            print(f"🧠 Persona sent as system instruction (~{tokens} tokens, "
+                  f"below the {self.min_cache_tokens}-token minimum for cached content)")
+            return self.genai.GenerativeModel(self.model_name, system_instruction=self.persona)
+        try:
+            self.cached_content = self.genai.caching.CachedContent.create(
+                model=self.model_name,
+                system_instruction=self.persona,
+                ttl=self.cache_ttl,
+            )
+            print("🧠 Persona stored as cached content.")
+            return self.genai.GenerativeModel.from_cached_content(cached_content=self.cached_content)
+        except Exception as e:
+            # Caching not available for this model. The system instruction is
+            # still a stable prefix the service can reuse between turns.
+            print(f"🧠 Persona sent as system instruction (no cached content: {e})")
+            self.cached_content = None
+            return self.genai.GenerativeModel(self.model_name, system_instruction=self.persona)
+
+    def chat(self, user_id, history=None):
+        """
+        Return the chat session of a user, creating it on first use.
+
+        Args:
+            user_id (str): The user the session belongs to
+            history (list): Previous turns to seed a new session with, as
+                [{"role": "user" | "model", "parts": [text]}, ...]
+        """
+        if user_id not in self.chats:
+            self.chats[user_id] = self.model.start_chat(history=list(history or []))
+        return self.chats[user_id]
+
+    def send(self, user_id, message, stream=False, retain=None):
+        """
+        Send one turn for a user. The request holds the retained history
+        and message, plus the persona unless it is cached content.
+
+        Args:
+            user_id (str): The user the message comes from
+            message (str): The new turn (query plus per-turn context)
+            stream (bool): Whether to stream the answer
+            retain (str): What the history keeps of this turn instead of
+                message, e.g. the query without its per-turn memories
+
+        Returns:
+            The Gemini response (iterable when stream is True)
+        """
+        chat = self.chat(user_id)
+        try:
+            history = self._trim_history(user_id, chat)
+        except Exception:
+            # The previous streamed answer was cancelled half-way, so the
+            # session history is incomplete: start a fresh chat
+            chat = self.chats[user_id] = self.model.start_chat(history=[])
+            history = []
+        self._pending[user_id] = (len(history), retain) if retain is not None else None
+        self.requests += 1
+        self.request_chars += sum(len(content_text(content)) for content in history) + len(message)
+        if self.cached_content is None:
+            self.request_chars += len(self.persona)
+        return chat.send_message(message, stream=stream)
+
+    def _trim_history(self, user_id, chat):
+        """
+        Replace the last message with what is retained of it and keep only
+        the last max_history_turns (user, model) pairs.
+
+        Returns:
+            list: The history the next request will carry
+        """
+        history = list(chat.history)
+        pending = self._pending.pop(user_id, None)
+        changed = False
+        if pending is not None:
+            index, retain = pending
+            if len(history) > index:
+                history[index] = {"role": "user", "parts": [retain]}
+                changed = True
+        keep = self.max_history_turns * 2
+        if len(history) > keep:
+            history = history[-keep:] if keep else []
+            changed = True
+        if changed:
+            chat.history = history
+        return history
+
+    def close(self):
+        """Delete the cached persona so it stops being billed."""
+        if self.cached_content is not None:
+            try:
+                self.cached_content.delete()
+            except Exception as e:
+                print(f"⚠️ Could not delete cached persona: {e}")
+            self.cached_content = None
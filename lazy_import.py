@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - deferred imports and background warm-up
+# google.generativeai, speech_recognition, gtts and mem0 take seconds to
+# import, and the clients built from them (MemoryClient, the wav2vec2 model)
+# even longer. With --fast-start the main scripts replace them with proxies
+# that import / construct on first use, and warm them up on a background
+# thread while the user is typing, so the prompt appears immediately.
+
+import importlib
+import sys
+import threading
+import time
+
+
+class _Lazy:
+    """Proxy that creates its target on first attribute access (thread safe)."""
+
+    def __init__(self, name, factory):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_target", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _lazy_load(self):
+        target = object.__getattribute__(self, "_lazy_target")
+        if target is not None:
+            return target
+        with object.__getattribute__(self, "_lazy_lock"):
+            target = object.__getattribute__(self, "_lazy_target")
+            if target is None:
+                target = object.__getattribute__(self, "_lazy_factory")()
+                object.__setattr__(self, "_lazy_target", target)
+        return target
+
+    @property
+    def _lazy_loaded(self):
+        return object.__getattribute__(self, "_lazy_target") is not None
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_load(), name, value)
+
+    def __repr__(self):
+        state = "loaded" if self._lazy_loaded else "not loaded"
+        return f"<lazy {object.__getattribute__(self, '_lazy_name')} ({state})>"
+
+
+class LazyModule(_Lazy):
+    """
+    A module imported on first attribute access.
+
+    Args:
+        name (str): Module to import, e.g. "google.generativeai"
+        on_load: Called with the module right after it is imported
+            (e.g. to configure an API key)
+    """
+
+    def __init__(self, name, on_load=None):
+        def factory():
+            module = importlib.import_module(name)
+            if on_load is not None:
+                on_load(module)
+            return module
+
+        super().__init__(name, factory)
+
+
+class LazyObject(_Lazy):
+    """
+    An object built by factory() on first attribute access.
+
+    Args:
+        factory: Function returning the object, e.g. lambda: sr.Recognizer()
+        name (str): Name shown in messages
+    """
+
+    def __init__(self, factory, name=None):
+        super().__init__(name or getattr(factory, "__name__", "object"), factory)
+
+
+def load_module(name, lazy=False, on_load=None):
+    """
+    Import a module now, or return a LazyModule when lazy is True.
+
+    Args:
+        name (str): Module to import
+        lazy (bool): Defer the import until first use
+        on_load: Called with the module once it is imported
+    """
+    if lazy:
+        return LazyModule(name, on_load=on_load)
+    module = importlib.import_module(name)
+    if on_load is not None:
+        on_load(module)
+    return module
+
+
+def require(name, feature, package=None):
+    """
+    Import an optional dependency, or fail with a message naming the
+    package to install and the feature that needs it.
+
+    Args:
+        name (str): Module to import, e.g. "scipy.signal"
+        feature (str): What needs it, e.g. "--pcm-player"
+        package (str): pip package (default: the top-level module name)
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        package = package or name.split(".")[0]
+        raise ImportError(
+            f"{feature} needs {package}: pip install {package} "
+            f"(or pip install -r requirements-optional.txt)"
+        ) from e
+
+
+def make_object(factory, lazy=False, name=None):
+    """Build the object now, or return a LazyObject when lazy is True."""
+    return LazyObject(factory, name=name) if lazy else factory()
+
+
+def warm_up(*targets, verbose=False):
+    """
+    Load lazy modules and objects on a daemon thread, in the given order.
+    Anything else in targets (already loaded) is skipped. A failure is only
+    reported: it is raised again where the target is first used.
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+
+    def run():
+        start = time.perf_counter()
+        for target in targets:
+            if not isinstance(target, _Lazy):
+                continue
+            try:
+                target._lazy_load()
+            except Exception as e:
+                print(f"\n⚠️ Warm-up of {target!r} failed: {e}", file=sys.stderr)
+        if verbose:
+            print(f"\n🔥 Warm-up finished in {time.perf_counter() - start:.1f}s")
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def is_loaded(obj):
+    """False only for a lazy proxy whose target has not been created yet."""
+    return not isinstance(obj, _Lazy) or obj._lazy_loaded
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - streaming Gemini answers sentence by sentence
+# Turns the chunks of a streamed `generate_content(..., stream=True)` response
+# into cleaned, complete sentences that can be handed to the speech pipeline
+# while the model is still generating.
+
+import re
+import threading
+import time
+
+from tts_pipeline import split_sentences
+
+# End of a sentence: end punctuation followed by whitespace, or a line break
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…;:])\s+|\n+")
+
+
+def clean_text(text):
+    """Remove the markdown / emoticon markers Gemini likes to add."""
+    return text.replace("**", "").replace("^^", "")
+
+
+class SentenceChunker:
+    """
+    Accumulate streamed text and emit complete, cleaned sentences.
+
+    Cleaning happens on whole sentences, so markers split across two stream
+    chunks ("*" + "*") are still removed.
+
+    Args:
+        min_chars (int): Sentences shorter than this are merged with the next
+        max_chars (int): Text without a boundary is cut once it gets this long
+    """
+
+    def __init__(self, min_chars=20, max_chars=200):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def push(self, text):
+        """Add streamed text and return the sentences it completed."""
+        self.buffer += text
+        sentences = []
+        while True:
+            boundary = None
+            for match in _SENTENCE_BOUNDARY.finditer(self.buffer):
+                if len(clean_text(self.buffer[:match.start()]).strip()) >= self.min_chars:
+                    boundary = match
+                    break
+            if boundary is None:
+                break
+            sentences.extend(self._emit(self.buffer[:boundary.start()]))
+            self.buffer = self.buffer[boundary.end():]
+
+        if len(self.buffer) > self.max_chars:
+            # No sentence end in sight: speak the clauses we already have
+            parts = self._emit(self.buffer)
+            self.buffer = parts.pop() if parts else ""
+            sentences.extend(parts)
+        return sentences
+
+    def flush(self):
+        """Return whatever is left once the stream has ended."""
+        sentences = self._emit(self.buffer)
+        self.buffer = ""
+        return sentences
+
+    def _emit(self, text):
+        text = clean_text(text).strip()
+        if not text:
+            return []
+        return split_sentences(text, min_chars=0, max_chars=self.max_chars, first_max_chars=self.max_chars)
+
+
+class GeminiStream:
+    """
+    Wrap a streaming Gemini response: iterate complete sentences, collect the
+    full text and cancel the rest of the generation on request.
+
+    Args:
+        response: The result of `model.generate_content(prompt, stream=True)`
+        chunker (SentenceChunker): Sentence splitter (default: a new one)
+    """
+
+    def __init__(self, response, chunker=None):
+        self.response = response
+        self.chunker = chunker or SentenceChunker()
+        self.cancelled = threading.Event()
+        # time.perf_counter() when the first chunk arrived
+        self.first_chunk_at = None
+        self._parts = []
+
+    @property
+    def text(self):
+        """The cleaned text received so far."""
+        return clean_text("".join(self._parts)).strip()
+
+    def sentences(self):
+        """Yield complete sentences as soon as they have been generated."""
+        for chunk in self.response:
+            if self.first_chunk_at is None:
+                self.first_chunk_at = time.perf_counter()
+            if self.cancelled.is_set():
+                return
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk without text parts (e.g. a safety or finish-only chunk)
+                continue
+            self._parts.append(text)
+            yield from self.chunker.push(text)
+        if not self.cancelled.is_set():
+            yield from self.chunker.flush()
+
+    def cancel(self):
+        """Stop reading and cancel the underlying request, if possible."""
+        self.cancelled.set()
+        # google-generativeai keeps the transport stream in `_iterator`:
+        # a gRPC call (cancel) or a generator for the REST transport (close)
+        iterator = getattr(self.response, "_iterator", None)
+        for target in (iterator, self.response):
+            for name in ("cancel", "close"):
+                method = getattr(target, name, None)
+                if callable(method):
+                    try:
+                        method()
+                    except Exception:
+                        pass
+                    return
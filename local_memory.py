@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - embedded vector memory, a local stand-in for mem0
+# Same `add(messages, user_id=...)` / `search(query, user_id=..., limit=...)`
+# surface as mem0's MemoryClient, but embeddings are computed locally and
+# stored per user in a memory-mapped float16 matrix, and top-k retrieval is
+# one vectorized cosine-similarity product. No network is needed.
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import uuid
+import zlib
+
+import numpy as np
+
+DEFAULT_MEMORY_DIR = ".local_memory"
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """
+    Dependency-free text embedding: hashed word unigrams/bigrams and
+    character n-grams, L2-normalized. Works for Vietnamese with or without
+    diacritics (both forms are hashed).
+
+    Args:
+        dim (int): Embedding size
+        ngram_range (tuple): Character n-gram sizes
+    """
+
+    def __init__(self, dim=512, ngram_range=(3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    @staticmethod
+    def normalize(text):
+        return unicodedata.normalize("NFC", text).lower().strip()
+
+    @staticmethod
+    def strip_accents(text):
+        decomposed = unicodedata.normalize("NFD", text)
+        return "".join(c for c in decomposed if not unicodedata.combining(c)).replace("đ", "d")
+
+    def features(self, text):
+        text = self.normalize(text)
+        for variant in {text, self.strip_accents(text)}:
+            words = _WORD.findall(variant)
+            yield from words
+            yield from (f"{a} {b}" for a, b in zip(words, words[1:]))
+            padded = f" {' '.join(words)} "
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                yield from (padded[i:i + n] for i in range(len(padded) - n + 1))
+
+    def embed(self, texts):
+        """Return an (n, dim) float32 matrix of unit vectors."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in self.features(text)), dtype=np.uint32)
+            if hashes.size == 0:
+                continue
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], hashes % self.dim, signs)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+
+class _UserStore:
+    """Vectors (memory-mapped) and metadata (JSONL) of one user."""
+
+    def __init__(self, directory, dim, initial_capacity=256):
+        self.directory = directory
+        self.dim = dim
+        os.makedirs(directory, exist_ok=True)
+        self.meta_path = os.path.join(directory, "memories.jsonl")
+        self.vectors_path = os.path.join(directory, "vectors.f16")
+
+        self.entries = []
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+
+        rows = max(initial_capacity, len(self.entries))
+        if os.path.exists(self.vectors_path):
+            rows = max(rows, os.path.getsize(self.vectors_path) // (2 * dim))
+        self.vectors = self._open(rows)
+
+    def _open(self, rows):
+        mode = "r+" if os.path.exists(self.vectors_path) else "w+"
+        if mode == "r+" and os.path.getsize(self.vectors_path) < rows * self.dim * 2:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(rows * self.dim * 2)
+        return np.memmap(self.vectors_path, dtype=np.float16, mode=mode, shape=(rows, self.dim))
+
+    def append(self, entries, vectors):
+        needed = len(self.entries) + len(entries)
+        if needed > self.vectors.shape[0]:
+            self.vectors.flush()
+            self.vectors = self._open(max(needed, 2 * self.vectors.shape[0]))
+        self.vectors[len(self.entries):needed] = vectors
+        self.vectors.flush()
+        with open(self.meta_path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.entries.extend(entries)
+
+    def top_k(self, query_vector, limit):
+        count = len(self.entries)
+        if count == 0:
+            return []
+        scores = self.vectors[:count].astype(np.float32) @ query_vector
+        k = min(limit, count)
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.entries[i], float(scores[i])) for i in best]
+
+
+class LocalMemory:
+    """
+    Embedded memory store with the MemoryClient add/search surface.
+
+    Args:
+        directory (str): Where the per-user stores are kept
+        embedder: Object with `dim` and `embed(texts) -> (n, dim)` unit
+            vectors (default: HashingEmbedder)
+    """
+
+    def __init__(self, directory=DEFAULT_MEMORY_DIR, embedder=None):
+        self.directory = directory
+        self.embedder = embedder or HashingEmbedder()
+        self._stores = {}
+        self._lock = threading.Lock()
+
+    def _store(self, user_id):
+        if user_id not in self._stores:
+            safe_id = re.sub(r"[^\w.-]", "_", str(user_id))
+            self._stores[user_id] = _UserStore(os.path.join(self.directory, safe_id), self.embedder.dim)
+        return self._stores[user_id]
+
+    def add(self, messages, user_id, **kwargs):
+        """
+        Store the content of each message as a memory.
+
+        Args:
+            messages (list): [{"role": ..., "content": ...}, ...] as for mem0
+            user_id (str): Owner of the memories
+            kwargs: Accepted for compatibility with MemoryClient (ignored)
+        """
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        entries = [
+            {"id": uuid.uuid4().hex, "memory": m["content"].strip(), "role": m.get("role"), "created_at": now}
+            for m in messages if m.get("content", "").strip()
+        ]
+        if not entries:
+            return {"results": []}
+        vectors = self.embedder.embed([entry["memory"] for entry in entries])
+        with self._lock:
+            self._store(user_id).append(entries, vectors)
+        return {"results": [{"id": e["id"], "memory": e["memory"], "event": "ADD"} for e in entries]}
+
+    def search(self, query, user_id, limit=5, **kwargs):
+        """
+        Return the memories most similar to query, best first.
+
+        Args:
+            query (str): The text to search for
+            user_id (str): Owner of the memories
+            limit (int): Maximum number of results
+            kwargs: Accepted for compatibility with MemoryClient (ignored)
+
+        Returns:
+            dict: {"results": [{"id", "memory", "score", ...}, ...]}
+        """
+        query_vector = self.embedder.embed([query])[0]
+        with self._lock:
+            matches = self._store(user_id).top_k(query_vector, limit)
+        return {"results": [dict(entry, score=score) for entry, score in matches]}
@@ -5,36 +5,96 @@
 # Version: 0.1.0
 # Date: 13 May 2025 - 11 AM
 
-import google.generativeai as genai
 # import pyaudio
-import speech_recognition as sr
-import gtts
 import os
 import sys
 import threading
 import signal
+import subprocess
 import time
 from dotenv import load_dotenv
-from mem0 import MemoryClient
+from lazy_import import load_module, make_object, warm_up, is_loaded
+from tts_pipeline import SpeechPipeline, PcmPlayer
+from tts_backends import get_backend, player_command
+from llm_stream import GeminiStream, clean_text
+from tts_cache import TTSCache, DEFAULT_CACHE_DIR
+from gemini_session import GeminiSession
+from memory_queue import WriteBehindMemory
+from memory_cache import CachedMemory
+from prompt_builder import PromptBuilder
+from tracing import Tracer, DEFAULT_TRACE_FILE
+from wake_phrases import strip_wake_word
 
 # Load environment variables
 load_dotenv(dotenv_path="gemini_audio_chatbot/.env")
 
+# Show the prompt right away: heavy modules and clients are created on first
+# use and warmed up on a background thread while the user types
+FAST_START = "--fast-start" in sys.argv
+
+# Record per-turn latency spans to a JSONL file (--trace); summarize with `python tracing.py`
+tracer = Tracer(os.getenv("TRACE_FILE", DEFAULT_TRACE_FILE) if "--trace" in sys.argv else None)
+
 # Global flag for interrupting audio playback
 interrupt_flag = False
 
+# Speak sentence by sentence, synthesizing the next sentence while the current one plays
+PIPELINED_SPEECH = "--pipelined" in sys.argv
+# Stream the Gemini answer into the speech pipeline while it is being generated
+STREAMING = "--stream" in sys.argv
+speech_pipeline = None
+# Player process (mpg123 for MP3) playing the current answer (non-pipelined speech)
+audio_process = None
+# One in-process player for the whole session instead of an mpg123 per answer (--pcm-player)
+audio_player = PcmPlayer() if "--pcm-player" in sys.argv else None
+
+# Keep listening while speaking and stop the answer when the user talks (--barge-in)
+BARGE_IN = "--barge-in" in sys.argv
+barge_in = None
+
+# Hands-free: wait for the wake word "Mai ơi" instead of Enter (--wake-word)
+WAKE_WORD = "--wake-word" in sys.argv
+wake_word = None
+
+# Speech synthesis: Google Text-to-Speech, or espeak-ng on this machine (--offline-tts)
+if "--offline-tts" in sys.argv:
+    tts_backend = get_backend("espeak", voice=os.getenv("ESPEAK_VOICE") or None,
+                              speed=int(os.getenv("ESPEAK_SPEED", "160")))
+else:
+    tts_backend = get_backend("gtts")
+
+# Reuse previously synthesized speech from an on-disk cache
+tts_cache = None
+if "--tts-cache" in sys.argv:
+    # Audio of another backend sounds different: it gets its own directory
+    cache_dir = os.getenv("TTS_CACHE_DIR", DEFAULT_CACHE_DIR)
+    tts_cache = TTSCache(
+        cache_dir=cache_dir if tts_backend.name == "gtts" else os.path.join(cache_dir, tts_backend.name),
+        max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "100")) * 1024 * 1024),
+        extension=tts_backend.extension,
+    )
+
+# Answer repeated questions with the stored reply and its audio (--response-cache)
+response_cache = None
+if "--response-cache" in sys.argv:
+    from response_cache import ResponseCache
+    response_cache = ResponseCache(
+        similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95")),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        max_bytes=int(float(os.getenv("RESPONSE_CACHE_MAX_MB", "20")) * 1024 * 1024),
+    )
+# Audio chunks of the answer being spoken, kept for the response cache
+spoken_audio = None
+
 def signal_handler(sig, frame):
     """Handle Ctrl+C signal by stopping audio and raising KeyboardInterrupt to exit"""
     global interrupt_flag
     print("\nInterrupting audio...")
     interrupt_flag = True
     
-    # Kill any playing audio
+    # Stop the audio this session is playing
     try:
-        if sys.platform in ['darwin', 'linux']:
-            os.system("pkill mpg123")
-        elif sys.platform == 'win32':
-            os.system("taskkill /F /IM mpg123.exe 2> nul")
+        stop_playback()
     except:
         pass
     
@@ -44,35 +104,101 @@ def signal_handler(sig, frame):
 
 # Configure Gemini API
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
+genai = load_module("google.generativeai", lazy=FAST_START,
+                    on_load=lambda module: module.configure(api_key=GOOGLE_API_KEY))
+sr = load_module("speech_recognition", lazy=FAST_START)
+gtts = load_module("gtts", lazy=FAST_START)
+
+# Initialize mem0 client, or the embedded local store (--local-memory) which needs no network
+if "--local-memory" in sys.argv:
+    from local_memory import LocalMemory, DEFAULT_MEMORY_DIR
+    memory = LocalMemory(os.getenv("LOCAL_MEMORY_DIR", DEFAULT_MEMORY_DIR))
+else:
+    os.environ["MEM0_API_KEY"] = os.getenv("MEM0_API_KEY")
+    mem0 = load_module("mem0", lazy=FAST_START)
+    memory = make_object(lambda: mem0.MemoryClient(), lazy=FAST_START, name="MemoryClient")
+# The client itself, before the optional wrappers below (warmed up with --fast-start)
+memory_client = memory
 
-os.environ["MEM0_API_KEY"] = os.getenv("MEM0_API_KEY")
+# Cache memory.search results per user until that user's memories change (--memory-cache)
+memory_cache = None
+if "--memory-cache" in sys.argv:
+    memory = memory_cache = CachedMemory(memory, ttl=float(os.getenv("MEMORY_CACHE_TTL", "300")))
 
-# Initialize mem0 client
-memory = MemoryClient()
+# Write to memory on a background thread so the next turn does not wait (--async-memory)
+if "--async-memory" in sys.argv:
+    memory = WriteBehindMemory(memory)
 
 # Initialize speech recognizer
-r = sr.Recognizer()
+r = make_object(lambda: sr.Recognizer(), lazy=FAST_START, name="Recognizer")
+
+# Microphone kept open for the whole session (--persistent-mic), opened in main()
+persistent_mic = None
+MIC_SAMPLE_RATE = 16000
+
+# Offline wav2vec2 speech recognition (--local-asr), loaded in main()
+local_asr = None
+
+# Trim silence and resample captured audio before recognition (--preprocess-audio)
+PREPROCESS_AUDIO = "--preprocess-audio" in sys.argv
+# Rate the audio is downsampled to before it is uploaded to Google
+UPLOAD_RATE = int(os.getenv("ASR_UPLOAD_RATE", "16000"))
+
+# Long-lived Gemini model and chat sessions (--session), created in main()
+gemini_session = None
 
 def listen():
     """
     Listen to user's voice input and convert to text using Google Speech Recognition.
     Returns empty string if no speech is detected or an error occurs.
     """
+    if persistent_mic is not None:
+        # The stream is already open and calibrated: capture starts right away
+        print("🗣️ Say something now! (5 seconds max)")
+        print("Listening...")
+        try:
+            with tracer.span("capture"):
+                audio = persistent_mic.listen(timeout=5)
+        except sr.WaitTimeoutError:
+            print("❌ No speech detected within the timeout.")
+            return ""
+        return recognize(audio)
+
     with sr.Microphone() as source:
         print("🔊 Adjusting for ambient noise... Please wait...")
         # Adjust for ambient noise
-        r.adjust_for_ambient_noise(source)
+        with tracer.span("calibration"):
+            r.adjust_for_ambient_noise(source)
         print("🗣️ Say something now! (5 seconds max)")
         print("Listening...")
         try:
-            audio = r.listen(source, timeout=5)  # Listen for a maximum of 5 seconds
+            with tracer.span("capture"):
+                audio = r.listen(source, timeout=5)  # Listen for a maximum of 5 seconds
         except sr.WaitTimeoutError:
             print("❌ No speech detected within the timeout.")
             return ""
 
+        return recognize(audio)
+
+def recognize(audio):
+    """
+    Convert captured audio to text using Google Speech Recognition
+    (or the local wav2vec2 backend with --local-asr).
+    Returns empty string if the audio could not be recognized.
+    """
+    with tracer.span("asr"):
         try:
             print("🔄 Processing speech...")
+            if PREPROCESS_AUDIO:
+                from audio_preprocess import preprocess_audio_data
+                # wav2vec2 runs at 16 kHz; Google accepts any rate, fewer bytes upload faster
+                audio = preprocess_audio_data(audio, 16000 if local_asr is not None else UPLOAD_RATE)
+            if local_asr is not None:
+                # Offline wav2vec2 recognizer, audio stays in memory
+                text = local_asr.transcribe_audio_data(audio).strip()
+                if not text:
+                    raise sr.UnknownValueError()
+                return text
             text = r.recognize_google(audio, language="vi-VN")  # Default to Vietnamese
             return text
         except sr.UnknownValueError:
@@ -86,14 +212,16 @@ def listen():
             kill_audio()
             return ""
 
-def speak(text, lang="vi", slow=False):
+def speak(text, lang="vi", slow=False, audio=None):
     """
-    Convert text to speech using Google Text-to-Speech and play it using mpg123.
+    Convert text to speech with the TTS backend (Google Text-to-Speech by default) and play it.
+    With --barge-in the playback stops as soon as the user starts talking.
     
     Args:
         text (str): The text to convert to speech
         lang (str): Language code (default: 'vi' for Vietnamese)
         slow (bool): Whether to speak slowly
+        audio (bytes): Already synthesized audio of text (played as is)
     """
     global interrupt_flag
     interrupt_flag = False
@@ -101,40 +229,197 @@ def speak(text, lang="vi", slow=False):
     if not text:
         print("❌ No text to speak")
         return
-        
+
+    if barge_in is not None:
+        barge_in.arm()
+    try:
+        if audio is not None:
+            play_audio(audio)
+        elif PIPELINED_SPEECH:
+            speak_pipelined(text, lang=lang, slow=slow)
+        else:
+            play(text, lang=lang, slow=slow)
+    finally:
+        if barge_in is not None:
+            barge_in.disarm()
+
+def play(text, lang="vi", slow=False):
+    """
+    Synthesize the whole text to an audio file and play it (with mpg123 for MP3)
+    """
     print("🔊 Generating speech...")
-    output_file = "output.mp3"
+    output_file = "output" + tts_backend.extension
     
     try:
+        if audio_player is not None:
+            # Decode and play in memory: no output file and no player process
+            play_audio(synthesize(text, lang=lang, slow=slow))
+            return
+
         # Generate speech
-        tts = gtts.gTTS(text=text, lang=lang, slow=slow)
-        tts.save(output_file)
+        with tracer.span("tts_synthesis"):
+            if tts_cache is not None:
+                # Play straight from the cache instead of the shared output file
+                output_file = tts_cache.synthesize_path(text, lang, slow, tts_backend.synthesize)
+            else:
+                with open(output_file, "wb") as f:
+                    f.write(tts_backend.synthesize(text, lang=lang, slow=slow))
+        if spoken_audio is not None:
+            with open(output_file, "rb") as f:
+                spoken_audio.append(f.read())
         print("▶️ Playing audio... (Press Ctrl+C to stop)")
-        
-        # Play using mpg123 (external player)
-        exit_code = os.system(f"mpg123 -q {output_file}")
-        
-        if exit_code != 0 and not interrupt_flag:
-            print(f"⚠️ Warning: mpg123 exited with code {exit_code}")
+        play_file(output_file)
             
     except Exception as e:
         print(f"❌ Error in text-to-speech: {e}")
 
-def kill_audio():
+def play_audio(audio):
+    """
+    Play synthesized audio bytes: in memory with --pcm-player, otherwise
+    through an output file and a player process
+    """
+    try:
+        if audio_player is not None:
+            audio_player.start()
+            if interrupt_flag:
+                return
+            print("▶️ Playing audio... (Press Ctrl+C to stop)")
+            audio_player.feed(audio)
+            tracer.event("first_audio", since="response")
+            audio_player.finish()
+            return
+
+        output_file = "output" + tts_backend.extension
+        with open(output_file, "wb") as f:
+            f.write(audio)
+        print("▶️ Playing audio... (Press Ctrl+C to stop)")
+        play_file(output_file)
+    except Exception as e:
+        print(f"❌ Error playing audio: {e}")
+
+def play_file(output_file):
+    """
+    Play an audio file (MP3 with mpg123); only this process is stopped on interrupt
+    """
+    global audio_process
+
+    if interrupt_flag:
+        return
+    command = player_command(output_file)
+    audio_process = subprocess.Popen(command)
+    tracer.event("first_audio", since="response")
+    if interrupt_flag:
+        # Interrupted while the player was starting
+        audio_process.kill()
+    exit_code = audio_process.wait()
+    audio_process = None
+
+    if exit_code != 0 and not interrupt_flag:
+        print(f"⚠️ Warning: {command[0]} exited with code {exit_code}")
+
+def speak_cached(entry, lang="vi"):
+    """
+    Speak a reply from the response cache: its stored audio, or, when it was
+    stored without audio, synthesize it once and keep the audio with it
+    """
+    global spoken_audio
+
+    if entry.audio:
+        speak(entry.text, lang=lang, audio=entry.audio)
+        return
+    spoken_audio = []
+    speak(entry.text, lang=lang)
+    if spoken_audio and not interrupt_flag:
+        response_cache.set_audio(entry, tts_backend.concat(spoken_audio))
+
+def synthesize(text, lang="vi", slow=False):
+    """
+    Synthesize text to audio bytes with the TTS backend, going through the TTS cache when it is enabled
+    """
+    with tracer.span("tts_synthesis"):
+        if tts_cache is not None:
+            audio = tts_cache.synthesize(text, lang, slow, tts_backend.synthesize)
+        else:
+            audio = tts_backend.synthesize(text, lang=lang, slow=slow)
+    if spoken_audio is not None:
+        spoken_audio.append(audio)
+    return audio
+
+def speak_pipelined(text, lang="vi", slow=False):
+    """
+    Speak text sentence by sentence: the next sentence is synthesized in the
+    background while the current one plays, so the first audio starts after
+    only the first sentence has been synthesized.
+
+    Args:
+        text (str): The text to convert to speech
+        lang (str): Language code (default: 'vi' for Vietnamese)
+        slow (bool): Whether to speak slowly
+    """
+    global speech_pipeline
+
+    print("🔊 Generating speech (pipelined)...")
+    pipeline = SpeechPipeline(lambda sentence: synthesize(sentence, lang=lang, slow=slow), player_factory=new_player)
+    speech_pipeline = pipeline
+    try:
+        if interrupt_flag:
+            # Interrupted (barge-in) before playback started
+            return
+        pipeline.start()
+        print("▶️ Playing audio... (Press Ctrl+C to stop)")
+        pipeline.speak(text)
+        if pipeline.first_audio_at is not None:
+            tracer.event("first_audio", since="response", at=pipeline.first_audio_at)
+        if pipeline.time_to_first_audio is not None:
+            print(f"⏱️ Time to first audio: {pipeline.time_to_first_audio:.2f}s")
+    except Exception as e:
+        print(f"❌ Error in text-to-speech: {e}")
+    finally:
+        # No-op when playback already finished; stops it on Ctrl+C
+        pipeline.stop()
+        speech_pipeline = None
+
+def new_player():
     """
-    Stop any playing audio by setting the interrupt flag and killing mpg123
+    The player for a speech pipeline: the session's in-process player
+    (--pcm-player), or a new player process for the TTS backend's format
+    """
+    return audio_player if audio_player is not None else tts_backend.new_player()
+
+def stop_playback():
+    """
+    Stop the audio played by this session (not other mpg123 processes).
+    Safe to call from the microphone thread on barge-in.
     """
     global interrupt_flag
     interrupt_flag = True
-    
-    # Kill mpg123 process if it's running
+
+    # Stop the sentence pipeline, if one is running
+    pipeline = speech_pipeline
+    if pipeline is not None:
+        pipeline.stop()
+
+    # Silence the in-process player (it stays open for the next answer)
+    if audio_player is not None:
+        audio_player.stop()
+
+    # Kill our own player process if it's running
+    process = audio_process
+    if process is not None and process.poll() is None:
+        process.kill()
+
+def on_barge_in():
+    """The user started talking over the answer: stop it right away"""
+    stop_playback()
+    position = f" at {audio_player.position:.1f}s of the answer" if audio_player is not None else ""
+    print(f"\n✋ Barge-in: playback stopped{position}, {barge_in.reaction_time * 1000:.0f} ms after you started talking.")
+
+def kill_audio():
+    """
+    Stop any playing audio by setting the interrupt flag and killing our mpg123
+    """
     try:
-        # Use pkill on macOS/Linux
-        if sys.platform in ['darwin', 'linux']:
-            os.system("pkill mpg123")
-        # Use taskkill on Windows
-        elif sys.platform == 'win32':
-            os.system("taskkill /F /IM mpg123.exe 2> nul")
+        stop_playback()
     except Exception as e:
         print(f"❌ Error stopping audio: {e}")
         
@@ -154,32 +439,124 @@ def set_identity(name, age, hometown):
     memory.add([{"role": "system", "content": f"I am {age} years old."}], user_id=user_id, output_format="v1.1")
     memory.add([{"role": "system", "content": f"I am from {hometown}."}], user_id=user_id, output_format="v1.1")
 
-def think(user_input, user_id, memory):
-    print("🤔 Gemini is thinking...")
-    
-    try:
-        # Retrieve relevant memories from mem0
-        relevant_memories = memory.search(query=user_input, user_id=user_id, limit=5, output_format="v1.1")
-        # print("\nRetrieved memories:", relevant_memories)
-        memories_str = "\n".join(f"- {entry['memory']}" for entry in relevant_memories['results'])
-        print("\nRetrieved memories:\n", memories_str)
-
-        # Interact with Gemini API
-        system_prompt = f"""You are a helpful AI named Mai. You are 18 years old and from Cần Thơ. 
+# Static part of the prompt, identical on every turn
+PERSONA_PROMPT = """You are a helpful AI named Mai. You are 18 years old and from Cần Thơ. 
 Because you are young, you should always refer to yourself as 'em' and the user as 'anh'. 
 If the user's question is unclear, ask clarifying questions to understand their intent. 
 If you are still unable to understand the question, provide a general response. 
-Answer the question based on query and memories.
-User Memories:
-{memories_str}"""
+Answer the question based on query and memories."""
+
+# Assemble every prompt within a token budget (lowest-value memories are dropped first)
+prompt_builder = PromptBuilder(PERSONA_PROMPT, max_tokens=int(os.getenv("PROMPT_MAX_TOKENS", "2000")))
+
+def retrieve_memories(user_input, user_id, memory):
+    """
+    Retrieve the memories relevant to the user input from mem0, best first
+    """
+    with tracer.span("retrieval"):
+        relevant_memories = memory.search(query=user_input, user_id=user_id, limit=5, output_format="v1.1")
+    # print("\nRetrieved memories:", relevant_memories)
+    results = relevant_memories['results']
+    print("\nRetrieved memories:\n", "\n".join(f"- {entry['memory']}" for entry in results))
+    return results
+
+def build_prompt(user_input, user_id, memory, include_persona=True, memories=None):
+    """
+    Retrieve relevant memories from mem0 (unless already retrieved for this
+    turn) and build the prompt for Gemini
+    """
+    if memories is None:
+        memories = retrieve_memories(user_input, user_id, memory)
+    return prompt_builder.build(user_input, memories=memories, include_persona=include_persona).text
+
+def generate(user_input, user_id, memory, stream=False, memories=None):
+    """
+    Send one turn to Gemini. With a long-lived session the model is reused:
+    the request holds the persona (unless it is cached content), the
+    session's recent turns and the memories and query, and only the query
+    is kept in the session history. Otherwise a new model gets the full
+    prompt.
+    """
+    if gemini_session is not None:
+        delta = build_prompt(user_input, user_id, memory, include_persona=False, memories=memories)
+        tracer.mark("llm_request")
+        return gemini_session.send(user_id, delta, stream=stream, retain=user_input)
+
+    prompt = build_prompt(user_input, user_id, memory, memories=memories)
+    model = genai.GenerativeModel('models/gemini-2.5-flash-preview-04-17')
+    tracer.mark("llm_request")
+    return model.generate_content(prompt, stream=stream)
 
-        model = genai.GenerativeModel('models/gemini-2.5-flash-preview-04-17')
-        response = model.generate_content(system_prompt + "\n" + user_input)
-        gemini_response = response.text.strip().replace("**", "").replace("^^", "")
+def think(user_input, user_id, memory, memories=None):
+    print("🤔 Gemini is thinking...")
+    
+    try:
+        # Interact with Gemini API
+        response = generate(user_input, user_id, memory, memories=memories)
+        gemini_response = clean_text(response.text.strip())
+        # The answer arrives in one piece: first token and completion coincide
+        tracer.event("llm_first_token", since="llm_request")
+        tracer.event("llm", since="llm_request")
         return gemini_response
     except Exception as e:
         print(f"❌ Error interacting with Gemini API: {e}")
         return None
+
+def think_streaming(user_input, user_id, memory, lang="vi", slow=False, memories=None):
+    """
+    Stream the Gemini answer and speak each sentence as soon as it is complete,
+    while the rest of the answer is still being generated.
+    Press Ctrl+C to cancel the rest of the generation and stop speaking.
+
+    Returns:
+        str: The (possibly partial) answer, or None on error
+    """
+    global speech_pipeline
+    print("🤔 Gemini is thinking (streaming)...")
+
+    pipeline = SpeechPipeline(lambda sentence: synthesize(sentence, lang=lang, slow=slow), player_factory=new_player)
+    speech_pipeline = pipeline
+    stream = None
+    if barge_in is not None:
+        barge_in.arm()
+    try:
+        stream = GeminiStream(generate(user_input, user_id, memory, stream=True, memories=memories))
+        pipeline.start()
+
+        print("\n💬 Mai: ", end="", flush=True)
+        for sentence in stream.sentences():
+            if pipeline.stopped.is_set():
+                # Barge-in: the user is already saying something else
+                stream.cancel()
+                break
+            print(sentence, end=" ", flush=True)
+            pipeline.feed(sentence)
+        print()
+        if stream.first_chunk_at is not None:
+            tracer.event("llm_first_token", since="llm_request", at=stream.first_chunk_at)
+        tracer.event("llm", since="llm_request")
+        pipeline.close()
+        pipeline.wait()
+        if pipeline.first_audio_at is not None:
+            tracer.event("first_audio", since="response", at=pipeline.first_audio_at)
+        if pipeline.time_to_first_audio is not None:
+            print(f"⏱️ Time to first audio: {pipeline.time_to_first_audio:.2f}s")
+        return stream.text
+    except KeyboardInterrupt:
+        print("\n⏹️ Generation cancelled.")
+        if stream is not None:
+            stream.cancel()
+            return stream.text
+        return None
+    except Exception as e:
+        print(f"❌ Error interacting with Gemini API: {e}")
+        return None
+    finally:
+        # No-op when playback already finished; stops it on Ctrl+C
+        pipeline.stop()
+        speech_pipeline = None
+        if barge_in is not None:
+            barge_in.disarm()
         
 def main():
     """Main function to run the Gemini Audio Chatbot"""
@@ -189,53 +566,169 @@ def main():
     print("- Type 'exit', 'quit', or press Ctrl+C to exit the program")
     print("===============================")
     user_id = "default_user"
+
+    # Keep the microphone open and calibrated in the background between turns
+    # (barge-in and the wake word need it too; barge-in reads 20 ms chunks to react quickly)
+    global persistent_mic, barge_in, interrupt_flag, spoken_audio
+    if "--persistent-mic" in sys.argv or BARGE_IN or WAKE_WORD:
+        from mic_stream import PersistentMicrophone
+        chunk_size = 320 if BARGE_IN else 1024
+        persistent_mic = make_object(lambda: PersistentMicrophone(r, sample_rate=MIC_SAMPLE_RATE, chunk_size=chunk_size).start(),
+                                     lazy=FAST_START, name="PersistentMicrophone")
+    if BARGE_IN:
+        from barge_in import BargeInMonitor
+        barge_in = BargeInMonitor(
+            persistent_mic,
+            on_barge_in=on_barge_in,
+            energy_ratio=float(os.getenv("BARGE_IN_RATIO", "4.0")),
+            sample_rate=MIC_SAMPLE_RATE,
+        )
+
+    # Recognize speech locally instead of with Google Speech Recognition
+    global local_asr
+    if "--local-asr" in sys.argv:
+        from asr_local import Wav2Vec2Backend
+        if not FAST_START:
+            print("🧩 Loading local speech recognition model...")
+        local_asr = make_object(lambda: Wav2Vec2Backend(
+            num_threads=int(os.getenv("ASR_THREADS", "0")) or None,
+            quantize="--asr-int8" in sys.argv,
+        ), lazy=FAST_START, name="Wav2Vec2Backend")
+
+    # Listen for "Mai ơi": enrolled templates, or the local recognizer without them
+    global wake_word
+    if WAKE_WORD:
+        from wake_word import WakeWordDetector, make_spotter, DEFAULT_TEMPLATE_DIR
+        try:
+            spotter = make_spotter(
+                os.getenv("WAKE_WORD_DIR", DEFAULT_TEMPLATE_DIR),
+                threshold=float(os.getenv("WAKE_WORD_THRESHOLD", "0")) or None,
+                transcribe=(lambda samples, rate: local_asr.transcribe(samples, rate)) if local_asr is not None else None,
+            )
+        except (FileNotFoundError, ValueError) as e:
+            print(f"❌ Wake word: {e}")
+            return
+        # The microphone is only opened by the first wait()
+        wake_word = WakeWordDetector(
+            persistent_mic,
+            spotter,
+            energy_ratio=float(os.getenv("WAKE_WORD_RATIO", "3.0")),
+            sample_rate=MIC_SAMPLE_RATE,
+        )
+
+    # Keep one model and chat session for the whole run, with the persona cached
+    global gemini_session
+    if "--session" in sys.argv:
+        gemini_session = make_object(lambda: GeminiSession(PERSONA_PROMPT, genai_module=genai),
+                                     lazy=FAST_START, name="GeminiSession")
     
     # Uncomment to set identity at startup
     # set_identity("Mai", "18", "Cần Thơ")
     
     # Check for slow speech mode from command line arguments
-    slow_speed = len(sys.argv) > 1 and sys.argv[1] == "--slow"
+    slow_speed = "--slow" in sys.argv
+
+    # Load what --fast-start deferred while the user types, most needed first
+    if FAST_START:
+        warm_up(genai, memory_client, gemini_session, gtts, sr, r, persistent_mic, local_asr)
     
     while True:
-        print("\n> ", end="")
-        user_command = input().strip()
-        
-        # Check for exit commands (case insensitive)
-        if user_command.lower() in ["exit", "quit", "thoát", "thoat"]:
-            print("Exiting program...")
-            break
-            
-        # If user just pressed Enter, start listening via microphone
-        if not user_command:
-            print("🎤 Listening via microphone...")
-            user_input = listen()
+        if barge_in is not None and barge_in.triggered:
+            # The user talked over the last answer: their utterance is already being captured
+            print("🎤 Listening (barge-in)...")
+            tracer.start_turn(input="barge-in")
+            with tracer.span("capture"):
+                audio = barge_in.utterance()
+            user_input = recognize(audio)
+            if user_input:
+                print(f"You said: {user_input}")
+        elif wake_word is not None:
+            print('\n👂 Say "Mai ơi" to talk (Ctrl+C to exit)...')
+            wake_word.wait()
+            tracer.start_turn(input="wake-word")
+            print("🔔 Wake word detected")
+            # The utterance is already being recorded from its start
+            with tracer.span("capture"):
+                audio = wake_word.utterance()
+            user_input = strip_wake_word(recognize(audio))
+            if not user_input:
+                # Just "Mai ơi": the request follows, on the same open stream
+                user_input = listen()
             if user_input:
                 print(f"You said: {user_input}")
         else:
-            # Use the typed command as input
-            user_input = user_command
-            print(f"Text input: {user_input}")
+            print("\n> ", end="")
+            user_command = input().strip()
+            
+            # Check for exit commands (case insensitive)
+            if user_command.lower() in ["exit", "quit", "thoát", "thoat"]:
+                print("Exiting program...")
+                break
+            tracer.start_turn(input="text" if user_command else "voice")
+                
+            # If user just pressed Enter, start listening via microphone
+            if not user_command:
+                print("🎤 Listening via microphone...")
+                user_input = listen()
+                if user_input:
+                    print(f"You said: {user_input}")
+            else:
+                # Use the typed command as input
+                user_input = user_command
+                print(f"Text input: {user_input}")
         
         if not user_input:
             print("No input detected. Try again.")
+            tracer.end_turn(result="no_input")
             continue
         
+        tracer.mark("response")
+        cached = None
         try:
-            gemini_response = think(user_input, user_id, memory)    
-            print("\n💬 Mai: {}".format(gemini_response))
-            
-            # Speak the response
-            speak(gemini_response, lang="vi", slow=False)
+            memories = None
+            if response_cache is not None:
+                # A repeated question is answered with the stored reply and audio
+                memories = retrieve_memories(user_input, user_id, memory)
+                cached = response_cache.lookup(user_input, memories, context=PERSONA_PROMPT)
+                interrupt_flag = False
+                spoken_audio = []
+
+            if cached is not None:
+                gemini_response = cached.text
+                print("\n💬 Mai (cached): {}".format(gemini_response))
+                speak_cached(cached, lang="vi")
+            elif STREAMING:
+                # Think and speak at the same time
+                gemini_response = think_streaming(user_input, user_id, memory, lang="vi", slow=False, memories=memories)
+                if not gemini_response:
+                    continue
+            else:
+                gemini_response = think(user_input, user_id, memory, memories=memories)    
+                print("\n💬 Mai: {}".format(gemini_response))
+                
+                # Speak the response
+                speak(gemini_response, lang="vi", slow=False)
+
+            if response_cache is not None and cached is None:
+                # Keep the audio only if the whole answer was played
+                audio = tts_backend.concat(spoken_audio) if spoken_audio and not interrupt_flag else None
+                response_cache.store(user_input, memories, PERSONA_PROMPT, gemini_response, audio=audio)
             
-            # Store the conversation in mem0
-            memory.add([
-                {"role": "user", "content": user_input},
-                {"role": "assistant", "content": gemini_response}
-            ], user_id=user_id, output_format="v1.1")
+            # Store the conversation in mem0 (a cached reply adds nothing new)
+            if cached is None:
+                with tracer.span("persistence"):
+                    memory.add([
+                        {"role": "user", "content": user_input},
+                        {"role": "assistant", "content": gemini_response}
+                    ], user_id=user_id, output_format="v1.1")
             
         except Exception as e:
             print(f"❌ Error processing request: {e}")
             speak("Xin lỗi, đã xảy ra lỗi khi xử lý yêu cầu của bạn.", lang="vi")
+        finally:
+            spoken_audio = None
+            prompt = prompt_builder.last if cached is None else None
+            tracer.end_turn(prompt_tokens=prompt.tokens if prompt is not None else None, cached=cached is not None)
 
 if __name__ == "__main__":
     try:
@@ -256,4 +749,21 @@ if __name__ == "__main__":
         # Clean up resources
         print("🧹 Cleaning up resources...")
         kill_audio()
+        if isinstance(memory, WriteBehindMemory):
+            print(f"💾 Saving {memory.pending} pending memory writes...")
+            memory.close()
+        if memory_cache is not None:
+            print(memory_cache.report())
+        if tts_cache is not None:
+            print(tts_cache.report())
+        if response_cache is not None:
+            print(response_cache.report())
+        if gemini_session is not None and is_loaded(gemini_session):
+            gemini_session.close()
+        if wake_word is not None:
+            print(wake_word.report())
+        if persistent_mic is not None and is_loaded(persistent_mic):
+            persistent_mic.close()
+        if audio_player is not None:
+            audio_player.close()
         print("👋 Goodbye!")
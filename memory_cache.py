@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - per-user cache of memory.search results
+# Repeated questions ("lúc trước anh có nói với em là anh thích màu gì nhỉ?"
+# asked three times in a row) are answered from a bounded LRU cache keyed by
+# the normalized query. Entries expire after a TTL and every entry of a user
+# is dropped as soon as memory.add writes for that user.
+
+import collections
+import re
+import threading
+import time
+import unicodedata
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(text):
+    """Case, Unicode form, punctuation and spacing do not change the query."""
+    text = unicodedata.normalize("NFC", text).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class CachedMemory:
+    """
+    Memory client wrapper that caches search() results.
+
+    Wrap it *inside* a WriteBehindMemory so the invalidation happens when a
+    write actually reaches the store.
+
+    Args:
+        memory: The wrapped memory client
+        ttl (float): Seconds a cached result stays valid
+        max_entries (int): Maximum cached results (least recently used are evicted)
+    """
+
+    def __init__(self, memory, ttl=300.0, max_entries=256):
+        self.memory = memory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._keys_by_user = collections.defaultdict(set)
+        # Bumped by every invalidation, so a search that was running during
+        # a write does not cache its (stale) result afterwards
+        self._generations = collections.defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.memory, name)
+
+    def search(self, query, user_id, limit=5, **kwargs):
+        key = (user_id, normalize_query(query), limit, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generations[user_id]
+
+        result = self.memory.search(query=query, user_id=user_id, limit=limit, **kwargs)
+
+        with self._lock:
+            if self._generations[user_id] != generation:
+                return result
+            self._entries[key] = (now, result)
+            self._entries.move_to_end(key)
+            self._keys_by_user[user_id].add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._keys_by_user[old_key[0]].discard(old_key)
+                self.evictions += 1
+        return result
+
+    def add(self, messages, user_id, **kwargs):
+        """Write through, then drop every cached result of that user."""
+        self.invalidate(user_id)
+        try:
+            return self.memory.add(messages, user_id=user_id, **kwargs)
+        finally:
+            # Results cached while the write was in flight are stale too
+            self.invalidate(user_id)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generations[user_id] += 1
+            keys = self._keys_by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (
+            f"🔎 Memory search cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['invalidations']} invalidations"
+        )
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - write-behind queue for memory.add
+# Wraps a memory client (mem0 MemoryClient or LocalMemory) so that add()
+# returns immediately and the write happens on a background thread. Pending
+# adds are batched (consecutive writes of the same user become one call),
+# writes that failed on a transient error (network, timeout, rate limit,
+# server error) are retried with backoff, and the writes of each user are
+# applied in the order they were made.
+
+import collections
+import queue
+import threading
+import time
+
+_STOP = object()
+
+# Exception classes (by name, so httpx / requests need not be imported) of
+# network failures that are worth retrying
+_TRANSIENT_ERRORS = {"ConnectionError", "TimeoutError", "TransportError", "TimeoutException", "Timeout"}
+
+
+def is_transient(error):
+    """
+    True for errors a retry may fix: network failures, timeouts, HTTP 408 /
+    429 and server errors. The chain of causes is followed, because clients
+    such as mem0 wrap the transport error in their own exception type.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__):
+            return True
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and (status in (408, 429) or status >= 500):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def has_content(messages):
+    """False when a message is missing its content (e.g. the answer failed)."""
+    return bool(messages) and all(
+        isinstance(m, dict) and isinstance(m.get("content"), str) and m["content"].strip() for m in messages
+    )
+
+
+class WriteBehindMemory:
+    """
+    Memory client wrapper with asynchronous, batched add().
+
+    search() and any other attribute are passed through to the wrapped client.
+
+    Args:
+        memory: The wrapped memory client
+        max_batch (int): Maximum queued adds merged into one round of writes
+        max_retries (int): Retries of a write failing on a transient error
+            before it is dropped; other errors drop it at once
+        retry_delay (float): First retry delay in seconds (doubles each time)
+    """
+
+    def __init__(self, memory, max_batch=16, max_retries=3, retry_delay=1.0):
+        self.memory = memory
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def __getattr__(self, name):
+        return getattr(self.memory, name)
+
+    def add(self, messages, user_id, **kwargs):
+        """Queue a write and return immediately. Adds with empty content are dropped."""
+        messages = list(messages)
+        if not has_content(messages):
+            self.failed += 1
+            print(f"⚠️ Memory write for {user_id} dropped: a message has no content.")
+            return {"results": [], "queued": False}
+        with self._idle:
+            self._pending += 1
+        self._queue.put((user_id, messages, kwargs))
+        return {"results": [], "queued": True}
+
+    def search(self, *args, **kwargs):
+        return self.memory.search(*args, **kwargs)
+
+    @property
+    def pending(self):
+        """Number of adds not written yet."""
+        return self._pending
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued add has been written (or dropped).
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout=30):
+        """Flush pending writes and stop the background thread."""
+        flushed = self.flush(timeout)
+        self._queue.put(_STOP)
+        self._thread.join(timeout=1)
+        if not flushed:
+            print(f"⚠️ {self._pending} memory writes were not saved before exit.")
+        return flushed
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            items = [item]
+            while len(items) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                items.append(item)
+
+            for user_id, kwargs, messages in self._batch(items):
+                self._write(user_id, messages, kwargs)
+            with self._idle:
+                self._pending -= len(items)
+                self._idle.notify_all()
+
+    @staticmethod
+    def _batch(items):
+        """
+        Merge consecutive adds of the same user and options into one write.
+        The order of each user's writes is kept.
+        """
+        per_user = collections.OrderedDict()
+        for user_id, messages, kwargs in items:
+            writes = per_user.setdefault(user_id, [])
+            if writes and writes[-1][0] == kwargs:
+                writes[-1][1].extend(messages)
+            else:
+                writes.append((kwargs, list(messages)))
+        for user_id, writes in per_user.items():
+            for kwargs, messages in writes:
+                yield user_id, kwargs, messages
+
+    def _write(self, user_id, messages, kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.memory.add(messages, user_id=user_id, **kwargs)
+                self.written += 1
+                return
+            except Exception as e:
+                if not is_transient(e) or attempt == self.max_retries:
+                    self.failed += 1
+                    print(f"❌ Error saving memory for {user_id} (dropped after {attempt + 1} attempts): {e}")
+                    return
+                time.sleep(self.retry_delay * 2 ** attempt)
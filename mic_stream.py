@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - persistent microphone with continuous ambient-noise tracking
+# One capture stream stays open for the whole session. A background thread
+# reads it continuously, updates the energy threshold from non-speech frames
+# (the same damped update speech_recognition uses) and keeps a short pre-roll
+# buffer, so a turn can start capturing the moment the user presses Enter,
+# without the usual one second of `adjust_for_ambient_noise`.
+
+import collections
+import queue
+import threading
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+
+class PersistentMicrophone:
+    """
+    Always-open microphone that hands out utterances as `sr.AudioData`.
+
+    Args:
+        recognizer (sr.Recognizer): Holds the energy threshold and the
+            pause/damping settings; its energy_threshold is kept up to date
+        sample_rate (int): Capture sample rate
+        chunk_size (int): Frames per read
+        pre_roll_seconds (float): Audio kept from before the speech onset
+        device_index (int): Input device (default: system default)
+    """
+
+    def __init__(self, recognizer, sample_rate=16000, chunk_size=1024, pre_roll_seconds=0.5, device_index=None):
+        self.recognizer = recognizer
+        self.source = sr.Microphone(device_index=device_index, sample_rate=sample_rate, chunk_size=chunk_size)
+        self.pre_roll_seconds = pre_roll_seconds
+        self.pre_roll = None
+        self.running = threading.Event()
+        self.in_utterance = threading.Event()
+        self._capture_queue = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def sample_rate(self):
+        return self.source.SAMPLE_RATE
+
+    @property
+    def sample_width(self):
+        return self.source.SAMPLE_WIDTH
+
+    @property
+    def seconds_per_buffer(self):
+        return self.source.CHUNK / self.source.SAMPLE_RATE
+
+    def start(self):
+        """Open the stream and start tracking the ambient noise."""
+        self.source.__enter__()
+        pre_roll_chunks = max(1, int(round(self.pre_roll_seconds / self.seconds_per_buffer)))
+        self.pre_roll = collections.deque(maxlen=pre_roll_chunks)
+        self.running.set()
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        """Stop the background reader and close the stream."""
+        self.running.clear()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.source.__exit__(None, None, None)
+
+    def add_listener(self, callback):
+        """Also hand every chunk read to callback(buffer), on the reader thread."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    @staticmethod
+    def energy(buffer):
+        """RMS energy of a chunk of 16-bit PCM (same scale as audioop.rms)."""
+        samples = np.frombuffer(buffer, dtype=np.int16).astype(np.float32)
+        if samples.size == 0:
+            return 0.0
+        return float(np.sqrt(np.mean(samples * samples)))
+
+    def _track_noise(self, energy):
+        """Move the energy threshold towards the level of a non-speech frame."""
+        r = self.recognizer
+        damping = r.dynamic_energy_adjustment_damping ** self.seconds_per_buffer
+        target = energy * r.dynamic_energy_ratio
+        r.energy_threshold = r.energy_threshold * damping + target * (1 - damping)
+
+    def _read_loop(self):
+        while self.running.is_set():
+            try:
+                buffer = self.source.stream.read(self.source.CHUNK)
+            except Exception:
+                if not self.running.is_set():
+                    break
+                time.sleep(self.seconds_per_buffer)
+                continue
+
+            energy = self.energy(buffer)
+            if not self.in_utterance.is_set() and energy <= self.recognizer.energy_threshold:
+                self._track_noise(energy)
+
+            with self._lock:
+                if self._capture_queue is not None:
+                    self._capture_queue.put((buffer, energy))
+                else:
+                    self.pre_roll.append((buffer, energy))
+                listeners = list(self._listeners)
+
+            for listener in listeners:
+                listener(buffer)
+
+    def listen(self, timeout=None, phrase_time_limit=None):
+        """
+        Capture one utterance from the already-open stream.
+
+        The pre-roll collected before the call is included, so a first
+        syllable spoken while pressing Enter is not clipped.
+
+        Args:
+            timeout (float): Seconds to wait for speech to start
+            phrase_time_limit (float): Maximum length of the utterance
+
+        Returns:
+            sr.AudioData: The captured utterance
+
+        Raises:
+            sr.WaitTimeoutError: If no speech started within timeout
+        """
+        capture_queue = queue.Queue()
+        with self._lock:
+            window = collections.deque(self.pre_roll, maxlen=self.pre_roll.maxlen)
+            self.pre_roll.clear()
+            self._capture_queue = capture_queue
+
+        try:
+            return self._capture(capture_queue, window, timeout, phrase_time_limit)
+        finally:
+            with self._lock:
+                self._capture_queue = None
+            self.in_utterance.clear()
+
+    def _capture(self, capture_queue, window, timeout, phrase_time_limit):
+        r = self.recognizer
+        seconds_per_buffer = self.seconds_per_buffer
+
+        # Speech already started in the pre-roll?
+        onset = any(energy > r.energy_threshold for _, energy in window)
+        waited = 0.0
+        while not onset:
+            buffer, energy = self._next(capture_queue)
+            window.append((buffer, energy))
+            waited += seconds_per_buffer
+            if energy > r.energy_threshold:
+                onset = True
+            elif timeout and waited > timeout:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+        self.in_utterance.set()
+        frames = [buffer for buffer, _ in window]
+        phrase_seconds = len(frames) * seconds_per_buffer
+        silence_seconds = 0.0
+        while True:
+            buffer, energy = self._next(capture_queue)
+            frames.append(buffer)
+            phrase_seconds += seconds_per_buffer
+            if energy > r.energy_threshold:
+                silence_seconds = 0.0
+            else:
+                silence_seconds += seconds_per_buffer
+            if silence_seconds > r.pause_threshold:
+                break
+            if phrase_time_limit and phrase_seconds > phrase_time_limit:
+                break
+
+        # Drop the trailing silence beyond what the recognizer keeps
+        trailing = int(max(0.0, silence_seconds - r.non_speaking_duration) / seconds_per_buffer)
+        if trailing:
+            frames = frames[:-trailing]
+        return sr.AudioData(b"".join(frames), self.sample_rate, self.sample_width)
+
+    def _next(self, capture_queue):
+        while True:
+            if not self.running.is_set():
+                raise OSError("microphone stream is closed")
+            try:
+                return capture_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - local stand-ins for the external services
+# Replaces Gemini (google.generativeai), gTTS, mem0's MemoryClient, the
+# microphone and Google speech recognition of speech_recognition, and the
+# mpg123 player with local fakes that only wait for a configurable latency
+# (mean + Gaussian jitter). The microphone replays recorded WAV files (or a
+# synthetic utterance) in real time. Used by bench_e2e.py to run the real
+# chatbot code offline.
+
+import os
+import random
+import stat
+import sys
+import tempfile
+import threading
+import time
+import types
+import wave
+
+import numpy as np
+
+# gTTS produces 32 kbit/s MP3: the fake audio has the same size per second
+BYTES_PER_SECOND = 4000
+# Vietnamese speech rate used to turn text length into audio duration
+CHARS_PER_SECOND = 14.0
+
+DEFAULT_ANSWER = (
+    "Dạ, em nghe rồi anh. Hôm nay trời Cần Thơ nắng đẹp, anh nhớ uống đủ nước nha. "
+    "Nếu anh cần em nhắc lịch hay tìm thông tin gì thì cứ nói với em nhé. "
+    "Em luôn sẵn sàng giúp anh mà."
+)
+DEFAULT_TRANSCRIPTS = [
+    "hôm nay thời tiết thế nào em",
+    "em nhắc anh lịch họp chiều nay nhé",
+    "lúc trước anh có nói với em là anh thích màu gì nhỉ",
+]
+
+
+class Latency:
+    """
+    Random delay: Gaussian around mean with standard deviation jitter.
+
+    Args:
+        mean (float): Mean delay in seconds
+        jitter (float): Standard deviation in seconds
+        rng (random.Random): Random source (seeded for reproducible runs)
+    """
+
+    def __init__(self, mean=0.0, jitter=0.0, rng=None):
+        self.mean = mean
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            value = self.rng.gauss(self.mean, self.jitter) if self.jitter else self.mean
+        return max(0.0, value)
+
+    def sleep(self):
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+# --- Gemini ---------------------------------------------------------------
+
+class _Part:
+    def __init__(self, text):
+        self.text = text
+
+
+class _StreamedResponse:
+    """Iterable of chunks with a per-chunk delay, like a streamed Gemini answer."""
+
+    def __init__(self, chunks, first, per_chunk, on_complete=None):
+        self._chunks = chunks
+        self._first = first
+        self._per_chunk = per_chunk
+        self._on_complete = on_complete
+        self._iterator = self._generate()
+        self.cancelled = False
+
+    def _generate(self):
+        self._first.sleep()
+        for i, chunk in enumerate(self._chunks):
+            if self.cancelled:
+                return
+            if i:
+                self._per_chunk.sleep()
+            yield _Part(chunk)
+        if self._on_complete is not None:
+            self._on_complete("".join(self._chunks))
+
+    def __iter__(self):
+        return self._iterator
+
+    def close(self):
+        self.cancelled = True
+
+    @property
+    def text(self):
+        return "".join(part.text for part in self)
+
+
+def content_chars(contents):
+    """Characters of a prompt: a string or a list of {"role", "parts"} contents."""
+    if isinstance(contents, str):
+        return len(contents)
+    return sum(len(str(part)) for content in contents for part in content["parts"])
+
+
+def make_genai_module(answer=DEFAULT_ANSWER, first=None, per_chunk=None, chunk_chars=60):
+    """
+    Build a stand-in `google.generativeai` module.
+
+    Args:
+        answer (str): Text every request answers with
+        first (Latency): Time to the first chunk (the whole answer when not streaming)
+        per_chunk (Latency): Time between streamed chunks
+        chunk_chars (int): Characters per streamed chunk
+    """
+    first = first or Latency()
+    per_chunk = per_chunk or Latency()
+    module = types.ModuleType("google.generativeai")
+    module.requests = 0
+    module.prompt_chars = 0
+    module.cache_requests = 0
+
+    def chunks():
+        return [answer[i:i + chunk_chars] for i in range(0, len(answer), chunk_chars)]
+
+    class CachedContent:
+        @staticmethod
+        def create(**kwargs):
+            module.cache_requests += 1
+            raise NotImplementedError("no context caching in the offline stand-in")
+
+    class GenerativeModel:
+        def __init__(self, model_name=None, system_instruction=None, **kwargs):
+            self.model_name = model_name
+            self.system_instruction = system_instruction
+
+        @classmethod
+        def from_cached_content(cls, cached_content):
+            return cls()
+
+        def generate_content(self, prompt, stream=False, on_complete=None):
+            module.requests += 1
+            module.prompt_chars += content_chars(prompt) + len(self.system_instruction or "")
+            response = _StreamedResponse(chunks(), first, per_chunk, on_complete)
+            if stream:
+                return response
+            text = response.text
+            return types.SimpleNamespace(text=text)
+
+        def start_chat(self, history=None):
+            return ChatSession(self, history)
+
+    class ChatSession:
+        def __init__(self, model, history):
+            self.model = model
+            self.history = list(history or [])
+
+        def send_message(self, message, stream=False):
+            # Like the real ChatSession, every request carries the whole history
+            self.history.append({"role": "user", "parts": [message]})
+            contents = list(self.history)
+
+            def complete(text):
+                self.history.append({"role": "model", "parts": [text]})
+
+            response = self.model.generate_content(contents, stream=True, on_complete=complete)
+            if stream:
+                return response
+            return types.SimpleNamespace(text=response.text)
+
+    module.configure = lambda **kwargs: None
+    module.GenerativeModel = GenerativeModel
+    module.caching = types.SimpleNamespace(CachedContent=CachedContent)
+    return module
+
+
+# --- gTTS -----------------------------------------------------------------
+
+def fake_mp3(text):
+    """Bytes standing for the MP3 of text: the size encodes the speech duration."""
+    seconds = max(0.3, len(text) / CHARS_PER_SECOND)
+    return b"\xff\xfb" + b"\x00" * (int(seconds * BYTES_PER_SECOND) - 2)
+
+
+# gTTS splits the text into chunks of at most 100 characters, one request each
+GTTS_CHUNK_CHARS = 100
+
+
+def make_gtts_module(latency=None):
+    """
+    Build a stand-in `gtts` module whose gTTS waits for latency once per
+    GTTS_CHUNK_CHARS characters, so synthesis time grows with the text.
+    """
+    latency = latency or Latency()
+    module = types.ModuleType("gtts")
+    module.requests = 0
+
+    class gTTS:
+        def __init__(self, text, lang="vi", slow=False, **kwargs):
+            self.text = text
+
+        def write_to_fp(self, fp):
+            module.requests += 1
+            for _ in range(max(1, -(-len(self.text) // GTTS_CHUNK_CHARS))):
+                latency.sleep()
+            fp.write(fake_mp3(self.text))
+
+        def save(self, path):
+            with open(path, "wb") as f:
+                self.write_to_fp(f)
+
+    module.gTTS = gTTS
+    return module
+
+
+# --- mem0 -----------------------------------------------------------------
+
+def make_mem0_module(search_latency=None, add_latency=None):
+    """Build a stand-in `mem0` module with an in-memory MemoryClient."""
+    search_latency = search_latency or Latency()
+    add_latency = add_latency or Latency()
+    module = types.ModuleType("mem0")
+
+    class MemoryClient:
+        def __init__(self, *args, **kwargs):
+            self.memories = {}
+            self._lock = threading.Lock()
+
+        def add(self, messages, user_id, **kwargs):
+            add_latency.sleep()
+            with self._lock:
+                self.memories.setdefault(user_id, []).extend(m["content"] for m in messages)
+            return {"results": []}
+
+        def search(self, query, user_id, limit=5, **kwargs):
+            search_latency.sleep()
+            with self._lock:
+                memories = list(self.memories.get(user_id, []))[-limit:]
+            return {"results": [{"memory": m, "score": 0.5} for m in reversed(memories)]}
+
+    module.MemoryClient = MemoryClient
+    return module
+
+
+# --- Microphone and speech recognition -------------------------------------
+
+def synthetic_utterance(sample_rate, seconds=1.5):
+    """A speech-like test signal (voiced tone with a syllable-rate envelope)."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 3 * t))
+    voice = np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t)
+    return (6000 * envelope * voice).astype(np.int16)
+
+
+def load_wav(path, sample_rate):
+    """Read a 16-bit WAV file as mono int16 at sample_rate."""
+    from audio_preprocess import to_mono_resampled
+
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        frames = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        frames = frames.reshape(-1, f.getnchannels())
+        rate = f.getframerate()
+    return to_mono_resampled(frames, rate, sample_rate)
+
+
+class UtteranceLibrary:
+    """
+    The utterances the fake microphone plays, in turn, with their transcripts.
+
+    Args:
+        wav_paths (list): WAV files; a .txt file next to each one holds its
+            transcript (default: a synthetic utterance and canned transcripts)
+    """
+
+    def __init__(self, wav_paths=None):
+        self.wav_paths = list(wav_paths or [])
+        self.index = 0
+        self.last_transcript = None
+        self._cache = {}
+
+    def next(self, sample_rate):
+        """Return (samples, transcript) of the next utterance."""
+        i = self.index
+        self.index += 1
+        if not self.wav_paths:
+            self.last_transcript = DEFAULT_TRANSCRIPTS[i % len(DEFAULT_TRANSCRIPTS)]
+            return synthetic_utterance(sample_rate), self.last_transcript
+
+        path = self.wav_paths[i % len(self.wav_paths)]
+        key = (path, sample_rate)
+        if key not in self._cache:
+            transcript_path = os.path.splitext(path)[0] + ".txt"
+            transcript = DEFAULT_TRANSCRIPTS[i % len(DEFAULT_TRANSCRIPTS)]
+            if os.path.exists(transcript_path):
+                with open(transcript_path, "r", encoding="utf-8") as f:
+                    transcript = f.read().strip()
+            self._cache[key] = (load_wav(path, sample_rate), transcript)
+        samples, self.last_transcript = self._cache[key]
+        return samples, self.last_transcript
+
+
+class ReplayStream:
+    """
+    Microphone stream replaying: lead-in silence, one utterance, then
+    silence, at the pace of a real device (scaled by speed).
+    """
+
+    def __init__(self, samples, sample_rate, lead_in=1.2, speed=1.0, noise=30.0, seed=0):
+        rng = np.random.default_rng(seed)
+        lead = rng.normal(0, noise, int(lead_in * sample_rate))
+        self.audio = np.concatenate([lead, samples.astype(np.float64)]).astype(np.int16)
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.noise = noise
+        self.rng = rng
+        self.position = 0
+        self.started = time.perf_counter()
+
+    def read(self, frames):
+        if self.speed > 0:
+            due = self.started + (self.position + frames) / self.sample_rate / self.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        chunk = self.audio[self.position:self.position + frames]
+        if len(chunk) < frames:
+            silence = self.rng.normal(0, self.noise, frames - len(chunk)).astype(np.int16)
+            chunk = np.concatenate([chunk, silence])
+        self.position += frames
+        return chunk.tobytes()
+
+    def close(self):
+        pass
+
+
+def install_speech_recognition(sr, library, asr_latency=None, mic_speed=1.0):
+    """
+    Replace sr.Microphone with a replaying fake and
+    sr.Recognizer.recognize_google with a delayed canned transcript. The
+    real Recognizer.listen / adjust_for_ambient_noise still run on the audio.
+
+    Args:
+        sr: The speech_recognition module
+        library (UtteranceLibrary): What the microphone plays
+        asr_latency (Latency): Delay of recognize_google
+        mic_speed (float): Replay speed (1.0: real time, 0: as fast as possible)
+    """
+    asr_latency = asr_latency or Latency()
+
+    class FakeMicrophone(sr.AudioSource):
+        def __init__(self, device_index=None, sample_rate=None, chunk_size=1024):
+            self.SAMPLE_RATE = sample_rate or 16000
+            self.SAMPLE_WIDTH = 2
+            self.CHUNK = chunk_size
+            self.stream = None
+
+        def __enter__(self):
+            samples, _ = library.next(self.SAMPLE_RATE)
+            self.stream = ReplayStream(samples, self.SAMPLE_RATE, speed=mic_speed, seed=library.index)
+            return self
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            self.stream = None
+
+    def recognize_google(self, audio_data, language="en-US", **kwargs):
+        asr_latency.sleep()
+        if library.last_transcript is None:
+            raise sr.UnknownValueError()
+        return library.last_transcript
+
+    sr.Microphone = FakeMicrophone
+    sr.Recognizer.recognize_google = recognize_google
+
+
+# --- mpg123 ----------------------------------------------------------------
+
+MPG123_SCRIPT = """#!{python}
+# Offline stand-in for mpg123: "plays" the fake MP3 by sleeping for its duration
+import os, sys, time
+speed = float(os.environ.get("FAKE_MPG123_SPEED", "1"))
+source = sys.stdin.buffer if sys.argv[-1] == "-" else open(sys.argv[-1], "rb")
+while True:
+    chunk = source.read({bytes_per_second} // 10)
+    if not chunk:
+        break
+    if speed > 0:
+        time.sleep(len(chunk) / {bytes_per_second} / speed)
+"""
+
+
+def install_mpg123(playback_speed=1.0):
+    """
+    Put a fake `mpg123` executable first on PATH.
+
+    Args:
+        playback_speed (float): 1.0 plays in real time, 0 returns at once
+
+    Returns:
+        str: The directory holding the fake executable
+    """
+    directory = tempfile.mkdtemp(prefix="fake_mpg123_")
+    path = os.path.join(directory, "mpg123")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(MPG123_SCRIPT.format(python=sys.executable, bytes_per_second=BYTES_PER_SECOND))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+    os.environ["FAKE_MPG123_SPEED"] = str(playback_speed)
+    return directory
+
+
+def add_latency_arguments(parser):
+    """Add the stand-in latency options to an argparse parser."""
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the latency jitter")
+    parser.add_argument("--answer-chars", type=int, default=0, help="Length of the Gemini answer (0: default answer)")
+    parser.add_argument("--llm-latency", type=float, default=0.6, help="Seconds to the first Gemini chunk")
+    parser.add_argument("--llm-chunk-latency", type=float, default=0.08, help="Seconds between streamed chunks")
+    parser.add_argument("--tts-latency", type=float, default=0.35, help="Seconds per 100-character gTTS chunk")
+    parser.add_argument("--asr-latency", type=float, default=0.5, help="Seconds per Google ASR request")
+    parser.add_argument("--memory-latency", type=float, default=0.25, help="Seconds per mem0 search")
+    parser.add_argument("--memory-add-latency", type=float, default=0.4, help="Seconds per mem0 add")
+    parser.add_argument("--jitter", type=float, default=0.25,
+                        help="Jitter as a fraction of each latency (standard deviation)")
+
+
+def make_services(args):
+    """
+    Build the stand-in modules from the options of add_latency_arguments().
+
+    Returns:
+        dict: {"genai", "gtts", "mem0"} modules and the "asr" Latency
+    """
+    rng = random.Random(args.seed)
+
+    def latency(mean):
+        return Latency(mean, mean * args.jitter, random.Random(rng.random()))
+
+    answer = DEFAULT_ANSWER
+    if args.answer_chars:
+        answer = ("Dạ, em xin trả lời anh như sau. " * (args.answer_chars // 32 + 1))[:args.answer_chars]
+    return {
+        "genai": make_genai_module(answer, first=latency(args.llm_latency), per_chunk=latency(args.llm_chunk_latency)),
+        "gtts": make_gtts_module(latency(args.tts_latency)),
+        "mem0": make_mem0_module(latency(args.memory_latency), latency(args.memory_add_latency)),
+        "asr": latency(args.asr_latency),
+    }
+
+
+def install_modules(genai_module, gtts_module, mem0_module):
+    """Register the stand-in modules so that imports find them."""
+    google = sys.modules.get("google")
+    if google is None:
+        try:
+            import google
+        except ImportError:
+            google = types.ModuleType("google")
+            google.__path__ = []
+            sys.modules["google"] = google
+    google.generativeai = genai_module
+    sys.modules["google.generativeai"] = genai_module
+    sys.modules["gtts"] = gtts_module
+    sys.modules["mem0"] = mem0_module
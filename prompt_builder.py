@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - token-budgeted prompt assembly
+# One place that turns the persona, the retrieved memories, the chat history
+# and the query into the prompt sent to Gemini. The prompt size is estimated
+# locally, and when the context does not fit in the budget the lowest-value
+# items (weakest memories, oldest turns) are dropped first. The final size is
+# printed for every turn.
+
+import math
+
+# Gemini tokens are ~4 bytes of UTF-8 on average; Vietnamese diacritics take
+# 2-3 bytes per letter, which this accounts for better than a character count
+BYTES_PER_TOKEN = 4
+
+
+def estimate_tokens(text):
+    """Estimate the number of tokens of text without calling the API."""
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+
+def format_memory(memory):
+    return f"- {memory['memory']}"
+
+
+def format_turn(turn):
+    return f"User: {turn['user']}\nGemini: {turn['gemini']}"
+
+
+def build_persona(personal_data):
+    """
+    Build the static part of the prompt from personal_data.json
+    """
+    return f"""You are a helpful AI named {personal_data['name']}. You are {personal_data['age']} years old and from {personal_data['hometown']}.
+Because you are young, you should always refer to yourself as 'em' and the user as 'anh'.
+If the user's question is unclear, ask clarifying questions to understand their intent.
+If you are still unable to understand the question, provide a general response.
+Answer the question based on query and memories."""
+
+
+class Prompt:
+    """The assembled prompt and what went into it."""
+
+    def __init__(self, text, tokens, memories, history, dropped_memories, dropped_turns):
+        self.text = text
+        self.tokens = tokens
+        self.memories = memories
+        self.history = history
+        self.dropped_memories = dropped_memories
+        self.dropped_turns = dropped_turns
+
+    def __str__(self):
+        return self.text
+
+    def report(self):
+        dropped = ""
+        if self.dropped_memories or self.dropped_turns:
+            dropped = f", dropped {self.dropped_memories} memories / {self.dropped_turns} turns"
+        return (
+            f"📏 Prompt: {len(self.text)} chars, ~{self.tokens} tokens "
+            f"({len(self.memories)} memories, {len(self.history)} turns{dropped})"
+        )
+
+
+class PromptBuilder:
+    """
+    Assemble prompts within a token budget.
+
+    The persona and the query are always kept. Memories are ranked by their
+    search score (or search rank) and history turns by recency; context items
+    are admitted best first while they fit, so the lowest-value ones are the
+    first to go.
+
+    Args:
+        persona (str): The persona / system part of the prompt
+        max_tokens (int): Budget for the whole prompt
+        history_decay (float): Value of a turn relative to the next newer one
+        memory_decay (float): Value of a memory relative to the previous one,
+            for results without a score
+        estimator: Function text -> estimated tokens
+        verbose (bool): Print the prompt size of every turn
+    """
+
+    def __init__(self, persona, max_tokens=2000, history_decay=0.7, memory_decay=0.8,
+                 estimator=estimate_tokens, verbose=True):
+        self.persona = persona
+        self.max_tokens = max_tokens
+        self.history_decay = history_decay
+        self.memory_decay = memory_decay
+        self.estimator = estimator
+        self.verbose = verbose
+        self.last = None
+
+    def _rank(self, memories, history):
+        """Return [(value, kind, index, text)] for every context item."""
+        items = []
+        for i, memory in enumerate(memories):
+            score = memory.get("score")
+            value = float(score) if score is not None else self.memory_decay ** i
+            items.append((value, "memory", i, format_memory(memory)))
+        for i, turn in enumerate(history):
+            age = len(history) - 1 - i
+            items.append((self.history_decay ** age, "turn", i, format_turn(turn)))
+        items.sort(key=lambda item: -item[0])
+        return items
+
+    def build(self, query, memories=None, history=None, include_persona=True):
+        """
+        Build the prompt for one turn.
+
+        Args:
+            query (str): The user's input
+            memories (list): Search results ({"memory", "score"?}), best first;
+                None leaves the memories section out
+            history (list): Chat turns ({"user", "gemini"}), oldest first;
+                None leaves the history section out
+            include_persona (bool): False when the persona already lives in
+                a chat session and only the per-turn part is built
+
+        Returns:
+            Prompt
+        """
+        fixed = [self.persona] if include_persona else []
+        fixed.append(query)
+        headers = []
+        if memories is not None:
+            headers.append("User Memories:")
+        if history is not None:
+            headers.append("Here's the chat history:")
+        used = sum(self.estimator(part) + 1 for part in fixed + headers)
+
+        kept = set()
+        for value, kind, index, text in self._rank(memories or [], history or []):
+            cost = self.estimator(text) + 1
+            if used + cost <= self.max_tokens:
+                kept.add((kind, index))
+                used += cost
+
+        kept_memories = [m for i, m in enumerate(memories or []) if ("memory", i) in kept]
+        kept_history = [t for i, t in enumerate(history or []) if ("turn", i) in kept]
+
+        parts = [self.persona] if include_persona else []
+        if memories is not None:
+            parts.append("User Memories:\n" + "\n".join(format_memory(m) for m in kept_memories))
+        if history is not None:
+            parts.append("Here's the chat history:\n" + "\n".join(format_turn(t) for t in kept_history))
+        parts.append(query)
+        text = "\n".join(parts)
+
+        self.last = Prompt(
+            text,
+            self.estimator(text),
+            kept_memories,
+            kept_history,
+            len(memories or []) - len(kept_memories),
+            len(history or []) - len(kept_history),
+        )
+        if self.verbose:
+            print(self.last.report())
+        return self.last
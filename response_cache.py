@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - semantic cache of whole responses
+# A repeated question ("lúc trước anh có nói với em là anh thích màu gì
+# nhỉ?" asked three times in a row) is answered with the stored reply and
+# its already synthesized audio: no Gemini call and no TTS. A cached reply is
+# reused when the query is a near duplicate (cosine similarity of hashed
+# n-gram embeddings), it is still fresh, it was made with the same persona,
+# and the retrieved memories hold nothing the cached reply has not seen.
+
+import collections
+import hashlib
+import threading
+import time
+
+import numpy as np
+
+from local_memory import HashingEmbedder
+from memory_cache import normalize_query
+
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+
+def fingerprint(text):
+    """Short stable hash of a (normalized) text."""
+    return hashlib.sha256(normalize_query(text or "").encode("utf-8")).hexdigest()[:16]
+
+
+class CachedResponse:
+    """One stored reply: its text, its audio (bytes of the TTS backend, or None) and its context."""
+
+    def __init__(self, query, vector, context, memories, text, audio=None):
+        self.query = query
+        self.vector = vector
+        self.context = context
+        self.memories = memories
+        self.text = text
+        self.audio = audio
+        self.created = time.monotonic()
+        self.hits = 0
+
+    @property
+    def size(self):
+        return len(self.text.encode("utf-8")) + (len(self.audio) if self.audio else 0)
+
+
+class ResponseCache:
+    """
+    Bounded cache of (query, context) -> reply text and audio.
+
+    Args:
+        similarity (float): Minimum cosine similarity of two queries for a hit
+            (1.0: only identical normalized queries)
+        ttl (float): Seconds a reply stays fresh
+        max_entries (int): Maximum stored replies (least recently used are evicted)
+        max_bytes (int): Maximum size of the stored text and audio
+        embedder: Object with `embed(texts) -> (n, dim)` unit vectors
+            (default: HashingEmbedder)
+    """
+
+    def __init__(self, similarity=0.95, ttl=3600.0, max_entries=256, max_bytes=DEFAULT_MAX_BYTES, embedder=None):
+        self.similarity = similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.embedder = embedder or HashingEmbedder()
+        self.hits = 0
+        self.misses = 0
+        self.audio_hits = 0
+        self.expired = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _memory_keys(memories):
+        """Fingerprints of the distinct retrieved memory texts."""
+        return {fingerprint(m["memory"] if isinstance(m, dict) else m) for m in memories or []}
+
+    def lookup(self, query, memories=None, context=""):
+        """
+        Return the CachedResponse for a near-duplicate query, or None.
+
+        Args:
+            query (str): The user's input
+            memories (list): The memories retrieved for this turn
+            context (str): Everything else the reply depends on (e.g. the persona)
+        """
+        normalized = normalize_query(query)
+        context_key = fingerprint(context)
+        memory_keys = self._memory_keys(memories)
+        vector = self.embedder.embed([normalized])[0]
+        now = time.monotonic()
+
+        with self._lock:
+            best, best_score = None, self.similarity
+            for key, entry in list(self._entries.items()):
+                if now - entry.created > self.ttl:
+                    self._remove(key)
+                    self.expired += 1
+                    continue
+                if entry.context != context_key:
+                    continue
+                # The cached exchange itself may have been stored as memories since
+                own = {fingerprint(entry.query), fingerprint(entry.text)}
+                if not memory_keys - own <= entry.memories:
+                    continue
+                score = 1.0 if entry.query == normalized else float(np.dot(vector, entry.vector))
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best.query)
+            best.hits += 1
+            self.hits += 1
+            if best.audio:
+                self.audio_hits += 1
+            return best
+
+    def store(self, query, memories, context, text, audio=None):
+        """
+        Store a reply (and its audio, if complete) for later lookups.
+
+        Returns:
+            CachedResponse: The stored entry (None when text is empty)
+        """
+        if not text:
+            return None
+        normalized = normalize_query(query)
+        entry = CachedResponse(
+            normalized,
+            self.embedder.embed([normalized])[0],
+            fingerprint(context),
+            self._memory_keys(memories),
+            text,
+            audio or None,
+        )
+        with self._lock:
+            self._remove(normalized)
+            self._entries[normalized] = entry
+            self.bytes += entry.size
+            while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return entry
+
+    def set_audio(self, entry, audio):
+        """Keep the audio synthesized for an entry stored without it."""
+        with self._lock:
+            if self._entries.get(entry.query) is entry and not entry.audio:
+                self.bytes += len(audio)
+                entry.audio = audio
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "llm_calls_avoided": self.hits,
+            "syntheses_avoided": self.audio_hits,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (
+            f"💬 Response cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), {stats['llm_calls_avoided']} Gemini calls and "
+            f"{stats['syntheses_avoided']} syntheses avoided"
+        )
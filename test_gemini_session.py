@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - GeminiSession against the offline Gemini stand-in
+# Run with: python -m pytest -q
+
+from gemini_session import GeminiSession, content_text
+from offline_services import DEFAULT_ANSWER, make_genai_module
+
+PERSONA = "You are a helpful AI named Mai. You are 18 years old and from Cần Thơ."
+MEMORIES = "User Memories:\n- Anh thích màu xanh dương\n- Anh sống ở Cần Thơ\n"
+
+
+def send_turns(session, count, user_id="u"):
+    for i in range(count):
+        query = f"câu hỏi số {i}"
+        session.send(user_id, MEMORIES + query, retain=query).text
+
+
+def test_short_persona_is_not_offered_for_caching():
+    genai = make_genai_module()
+    session = GeminiSession(PERSONA, genai_module=genai)
+    assert genai.cache_requests == 0
+    assert session.cached_content is None
+
+
+def test_history_is_trimmed_and_keeps_queries_without_memories():
+    genai = make_genai_module()
+    session = GeminiSession(PERSONA, genai_module=genai, max_history_turns=2)
+    send_turns(session, 5)
+
+    history = session.chats["u"].history
+    # 2 retained turns plus the last exchange, not yet trimmed
+    assert len(history) == 6
+    user_parts = [content_text(c) for c in history if c["role"] == "user"]
+    assert user_parts[:-1] == ["câu hỏi số 2", "câu hỏi số 3"]
+    assert all("User Memories" not in text for text in user_parts[:-1])
+
+
+def test_request_chars_counts_persona_history_and_message():
+    genai = make_genai_module()
+    session = GeminiSession(PERSONA, genai_module=genai, max_history_turns=2)
+    send_turns(session, 5)
+
+    assert session.requests == genai.requests == 5
+    assert session.request_chars == genai.prompt_chars
+    # Request i carries the uncached persona, the last two queries (without
+    # memories) and answers
+    expected = 0
+    for i in range(5):
+        expected += len(PERSONA)
+        retained = range(max(0, i - 2), i)
+        expected += sum(len(f"câu hỏi số {j}") + len(DEFAULT_ANSWER) for j in retained)
+        expected += len(MEMORIES + f"câu hỏi số {i}")
+    assert session.request_chars == expected
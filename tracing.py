@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - per-turn latency tracing
+# Each turn records timed spans for the stages of the voice pipeline
+# (capture, ambient calibration, ASR, retrieval, LLM first token and
+# completion, TTS synthesis, first audio, persistence) and is appended to a
+# JSONL file as one line. Running this file summarizes the p50/p95/p99 of
+# every stage across all recorded sessions.
+#
+# Usage:
+#   python tracing.py [traces.jsonl ...]
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+DEFAULT_TRACE_FILE = "traces.jsonl"
+
+
+class Tracer:
+    """
+    Collect the spans of the current turn and write one JSONL line per turn.
+
+    A Tracer without a path is disabled: every call returns immediately.
+    Spans can be recorded from any thread while a turn is open.
+
+    Args:
+        path (str): The JSONL file turns are appended to (None: disabled)
+        session (str): Session id written with every turn (default: random)
+    """
+
+    def __init__(self, path=None, session=None):
+        self.path = path
+        self.enabled = path is not None
+        self.session = session or uuid.uuid4().hex[:12]
+        self.turns = 0
+        self._turn = None
+        self._lock = threading.Lock()
+
+    def start_turn(self, **attrs):
+        """Open a new turn; attrs are written with it."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.turns += 1
+            self._turn = {
+                "start": time.perf_counter(),
+                "time": time.time(),
+                "attrs": dict(attrs),
+                "marks": {},
+                "spans": [],
+            }
+
+    def mark(self, name):
+        """Remember the current time under name (for event())."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._turn is not None:
+                self._turn["marks"][name] = time.perf_counter()
+
+    def record(self, name, start, end=None, **attrs):
+        """
+        Record a span between two time.perf_counter() values.
+
+        Args:
+            name (str): Stage name
+            start (float): Start time
+            end (float): End time (default: now)
+        """
+        if not self.enabled or start is None:
+            return
+        end = time.perf_counter() if end is None else end
+        with self._lock:
+            turn = self._turn
+            if turn is None:
+                return
+            span = {"name": name, "start": round(start - turn["start"], 6), "duration": round(end - start, 6)}
+            if attrs:
+                span["attrs"] = attrs
+            turn["spans"].append(span)
+
+    def event(self, name, since, at=None):
+        """
+        Record the time from mark `since` to `at` (default: now), once per turn,
+        e.g. the first audio after the response started.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            turn = self._turn
+            if turn is None or since not in turn["marks"]:
+                return
+            if any(span["name"] == name for span in turn["spans"]):
+                return
+            start = turn["marks"][since]
+        self.record(name, start, at)
+
+    @contextlib.contextmanager
+    def span(self, name, **attrs):
+        """Time the body of a with block as one span."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, **attrs)
+
+    def end_turn(self, **attrs):
+        """Close the turn and append it to the trace file."""
+        if not self.enabled:
+            return
+        with self._lock:
+            turn, self._turn = self._turn, None
+        if turn is None:
+            return
+        turn["attrs"].update(attrs)
+        line = {
+            "session": self.session,
+            "turn": self.turns,
+            "time": round(turn["time"], 3),
+            "total": round(time.perf_counter() - turn["start"], 6),
+            "attrs": turn["attrs"],
+            "spans": turn["spans"],
+        }
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write trace: {e}")
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def load_stage_durations(paths):
+    """
+    Read trace files and return {stage: [per-turn duration, ...]}, in the
+    order stages first appear. Repeated spans of a turn (e.g. one TTS
+    synthesis per sentence) are added up.
+    """
+    stages = {}
+    sessions = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    turn = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                sessions.add(turn.get("session"))
+                totals = {}
+                for span in turn.get("spans", []):
+                    totals[span["name"]] = totals.get(span["name"], 0.0) + span["duration"]
+                totals["turn"] = turn.get("total", 0.0)
+                for name, duration in totals.items():
+                    stages.setdefault(name, []).append(duration)
+    return stages, sessions
+
+
+def summarize(stages):
+    """
+    Percentiles of every stage, "turn" last: {stage: {n, mean, p50, p95, p99}}
+    in seconds.
+    """
+    summary = {}
+    for name in [name for name in stages if name != "turn"] + ["turn"]:
+        if name not in stages:
+            continue
+        durations = sorted(stages[name])
+        summary[name] = {"n": len(durations), "mean": sum(durations) / len(durations)}
+        for p in (50, 95, 99):
+            summary[name][f"p{p}"] = percentile(durations, p)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize per-turn latency traces")
+    parser.add_argument("files", nargs="*", default=[os.getenv("TRACE_FILE", DEFAULT_TRACE_FILE)],
+                        help="Trace files (default: $TRACE_FILE or traces.jsonl)")
+    args = parser.parse_args()
+
+    stages, sessions = load_stage_durations(args.files)
+    if not stages:
+        print("No traced turns found.")
+        return
+    print(f"{len(stages['turn'])} turns in {len(sessions)} sessions")
+    print(f"{'stage':<18}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in summarize(stages).items():
+        cells = "".join(f"{row[p] * 1000:>10.1f}" for p in ("p50", "p95", "p99"))
+        print(f"{name:<18}{row['n']:>6}{cells}")
+
+
+if __name__ == "__main__":
+    main()
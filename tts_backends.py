@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - text-to-speech backends
+# Every backend turns text into audio bytes of one format and knows how that
+# format is played, so speak(), the sentence pipeline, the TTS cache and the
+# response cache work the same with any of them:
+#   gtts    Google Text-to-Speech (MP3, needs the network)
+#   espeak  espeak-ng running locally (WAV, offline, Vietnamese voice "vi")
+
+import io
+import shutil
+import struct
+import subprocess
+import sys
+import wave
+
+from tts_pipeline import Mpg123Player, gtts_synthesize
+
+
+def wav_info(data):
+    """
+    Read the format and the PCM frames of WAV bytes. Tolerates the
+    placeholder sizes written by programs streaming WAV to a pipe.
+
+    Returns:
+        tuple: (sample_rate, channels, sample_width, frames)
+    """
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("not a WAV file")
+    position = 12
+    fmt = None
+    while position + 8 <= len(data):
+        chunk_id = data[position:position + 4]
+        size = struct.unpack("<I", data[position + 4:position + 8])[0]
+        body = position + 8
+        if chunk_id == b"fmt ":
+            channels, sample_rate = struct.unpack("<HI", data[body + 2:body + 8])
+            sample_width = struct.unpack("<H", data[body + 14:body + 16])[0] // 8
+            fmt = (sample_rate, channels, sample_width)
+        elif chunk_id == b"data":
+            if fmt is None:
+                break
+            # The data size may be 0 or 0xFFFFFFFF when the writer could not seek back
+            end = len(data) if size in (0, 0xFFFFFFFF) else min(len(data), body + size)
+            return fmt + (data[body:end],)
+        position = body + size + (size & 1)
+    raise ValueError("WAV file without format or data")
+
+
+def make_wav(frames, sample_rate, channels=1, sample_width=2):
+    """Wrap PCM frames in a WAV header."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(sample_width)
+        f.setframerate(sample_rate)
+        f.writeframes(frames)
+    return buffer.getvalue()
+
+
+def concat_wav(chunks):
+    """
+    Join WAV files of the same format into one: the PCM frames are merged
+    under a single header (joined files would play only the first one).
+    """
+    chunks = [chunk for chunk in chunks if chunk]
+    if not chunks:
+        return b""
+    sample_rate, channels, sample_width, _ = wav_info(chunks[0])
+    frames = []
+    for chunk in chunks:
+        info = wav_info(chunk)
+        if info[:3] != (sample_rate, channels, sample_width):
+            raise ValueError("cannot join WAV chunks of different formats")
+        frames.append(info[3])
+    return make_wav(b"".join(frames), sample_rate, channels, sample_width)
+
+
+def wav_duration(data):
+    """Seconds of audio in WAV bytes."""
+    sample_rate, channels, sample_width, frames = wav_info(data)
+    return len(frames) / (sample_rate * channels * sample_width)
+
+
+def find_command(*candidates):
+    """The first candidate command (a list) whose program is installed, or None."""
+    for command in candidates:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+def wav_file_command(path):
+    """Command playing a WAV file with a player of this platform."""
+    if sys.platform == "darwin":
+        return ["afplay", path]
+    command = find_command(["aplay", "-q"], ["paplay"], ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"])
+    if command is None:
+        raise RuntimeError("no WAV player found (install alsa-utils, pulseaudio-utils or ffmpeg)")
+    return command + [path]
+
+
+def player_command(path):
+    """Command playing an audio file: mpg123 for MP3, a WAV player otherwise."""
+    if path.endswith(".mp3"):
+        return ["mpg123", "-q", path]
+    return wav_file_command(path)
+
+
+class WavPipePlayer(Mpg123Player):
+    """
+    Plays a sequence of WAV chunks through one `aplay` process reading raw
+    PCM from stdin, so sentences follow each other without gaps. The process
+    is started with the format of the first chunk (every chunk of a backend
+    has the same format).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.format = None
+
+    def start(self):
+        pass
+
+    def feed(self, data):
+        sample_rate, channels, sample_width, frames = wav_info(data)
+        if self.process is None:
+            if shutil.which("aplay") is None:
+                raise RuntimeError("streaming WAV playback needs aplay (alsa-utils), or use --pcm-player")
+            self.format = (sample_rate, channels, sample_width)
+            self.command = ["aplay", "-q", "-t", "raw", "-f", f"S{sample_width * 8}_LE",
+                            "-r", str(sample_rate), "-c", str(channels), "-"]
+            super().start()
+        super().feed(frames)
+
+    def finish(self):
+        if self.process is None:
+            return 0
+        return super().finish()
+
+
+class GTTSBackend:
+    """Google Text-to-Speech: natural voice, one network request per text."""
+
+    name = "gtts"
+    extension = ".mp3"
+    content_type = "audio/mpeg"
+
+    def synthesize(self, text, lang="vi", slow=False):
+        """
+        Synthesize text and return the MP3 bytes.
+
+        Args:
+            text (str): The text to convert to speech
+            lang (str): Language code (default: 'vi' for Vietnamese)
+            slow (bool): Whether to speak slowly
+        """
+        return gtts_synthesize(text, lang=lang, slow=slow)
+
+    def concat(self, chunks):
+        """One MP3 from the audio of consecutive sentences (MP3 frames can be joined)."""
+        return b"".join(chunks)
+
+    def new_player(self):
+        return Mpg123Player()
+
+
+class EspeakBackend:
+    """
+    espeak-ng (or espeak) as a local process: no network, a few milliseconds
+    per sentence on a CPU, robotic but intelligible Vietnamese.
+
+    Args:
+        voice (str): espeak voice; None uses the lang passed to synthesize()
+        speed (int): Words per minute (slow speech uses 70% of it)
+        command (str): Program to run (default: espeak-ng, else espeak)
+    """
+
+    name = "espeak"
+    extension = ".wav"
+    content_type = "audio/wav"
+
+    def __init__(self, voice=None, speed=160, command=None):
+        self.voice = voice
+        self.speed = speed
+        self.command = command or shutil.which("espeak-ng") or shutil.which("espeak")
+        if self.command is None:
+            raise RuntimeError("espeak-ng is not installed (e.g. apt install espeak-ng)")
+
+    def synthesize(self, text, lang="vi", slow=False):
+        """
+        Synthesize text and return WAV bytes.
+
+        Args:
+            text (str): The text to convert to speech
+            lang (str): Language code, used as the voice unless one was set
+            slow (bool): Whether to speak slowly
+        """
+        speed = int(self.speed * 0.7) if slow else self.speed
+        result = subprocess.run(
+            [self.command, "-v", self.voice or lang, "-s", str(speed), "--stdout", "--stdin"],
+            input=text.encode("utf-8"),
+            capture_output=True,
+            check=True,
+        )
+        # Rewrite the header: streamed to a pipe, its sizes are placeholders
+        sample_rate, channels, sample_width, frames = wav_info(result.stdout)
+        return make_wav(frames, sample_rate, channels, sample_width)
+
+    def concat(self, chunks):
+        """One WAV file from the audio of consecutive sentences."""
+        return concat_wav(chunks)
+
+    def new_player(self):
+        return WavPipePlayer()
+
+
+BACKENDS = {
+    "gtts": GTTSBackend,
+    "espeak": EspeakBackend,
+}
+
+
+def get_backend(name="gtts", **options):
+    """
+    Create a TTS backend by name.
+
+    Args:
+        name (str): One of BACKENDS ("gtts", "espeak")
+        options: Passed to the backend (e.g. voice, speed for espeak)
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"unknown TTS backend {name!r} (choose from {', '.join(BACKENDS)})")
+    return BACKENDS[name](**options)
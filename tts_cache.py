@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - content-addressed on-disk cache for synthesized speech
+# Audio is stored under the SHA-256 of (text, lang, slow), written atomically
+# (temp file + rename) so several sessions can share one cache directory, and
+# the least recently used files are evicted once the size cap is exceeded.
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_DIR = ".tts_cache"
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+class TTSCache:
+    """
+    On-disk speech cache with LRU eviction and hit/miss counters.
+
+    The modification time of a file is its last use: it is refreshed on
+    every hit, and the oldest files are evicted first. This works across
+    processes without a shared index.
+
+    Args:
+        cache_dir (str): Directory holding the cached audio files
+        max_bytes (int): Size cap of the cache directory
+        extension (str): File extension of the cached audio
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, extension=".mp3"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self.synthesis_seconds = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(text, lang="vi", slow=False):
+        """Content address of an utterance."""
+        payload = f"{lang}\x00{int(bool(slow))}\x00{text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def get(self, text, lang="vi", slow=False):
+        """Return the cached audio path, or None on a miss."""
+        path = self.path_for(self.key(text, lang, slow))
+        try:
+            # Mark as recently used
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def put(self, text, lang, slow, data):
+        """Store audio atomically and return its path."""
+        path = self.path_for(self.key(text, lang, slow))
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.evict(keep=path)
+        return path
+
+    def synthesize_path(self, text, lang, slow, synthesize):
+        """
+        Return the path of the audio for text, synthesizing it on a miss.
+
+        Args:
+            text (str): The text to convert to speech
+            lang (str): Language code
+            slow (bool): Whether to speak slowly
+            synthesize (callable): Function (text, lang=, slow=) -> audio bytes
+        """
+        path = self.get(text, lang, slow)
+        if path is not None:
+            with self._lock:
+                self.hits += 1
+            return path
+
+        start = time.perf_counter()
+        data = synthesize(text, lang=lang, slow=slow)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            self.synthesis_seconds += elapsed
+        return self.put(text, lang, slow, data)
+
+    def synthesize(self, text, lang, slow, synthesize):
+        """Like synthesize_path(), but return the audio bytes."""
+        path = self.synthesize_path(text, lang, slow, synthesize)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def evict(self, keep=None):
+        """Remove least recently used files until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(self.extension):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        """Hit/miss counters and an estimate of the synthesis time saved."""
+        lookups = self.hits + self.misses
+        average = self.synthesis_seconds / self.misses if self.misses else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "synthesis_seconds": self.synthesis_seconds,
+            "estimated_seconds_saved": self.hits * average,
+        }
+
+    def report(self):
+        stats = self.stats()
+        return (
+            f"📦 TTS cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate), "
+            f"~{stats['estimated_seconds_saved']:.1f}s of synthesis saved"
+        )
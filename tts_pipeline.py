@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - sentence-pipelined text-to-speech
+# Splits a reply into sentences, synthesizes sentence N+1 in the background
+# while sentence N is playing, and streams all chunks into a single player
+# so playback is gapless and time-to-first-audio does not grow with the
+# length of the answer.
+
+import collections
+import io
+import re
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+from lazy_import import require
+
+# Sentence boundaries: end punctuation followed by whitespace, or line breaks
+_SENTENCE_END = re.compile(r"(?<=[.!?…;:])\s+|\n+")
+# Soft boundaries used to cut sentences that are too long for one request
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
+_END_OF_STREAM = object()
+
+
+def split_sentences(text, min_chars=20, max_chars=200, first_max_chars=80):
+    """
+    Split text into chunks suitable for pipelined speech synthesis.
+
+    Very short sentences are merged with the next one (one synthesis request
+    each would cost more than it saves), and very long ones are cut at clause
+    boundaries or spaces. The first chunk is kept shorter so the first audio
+    is ready as soon as possible.
+
+    Args:
+        text (str): The text to split
+        min_chars (int): Sentences shorter than this are merged with the next
+        max_chars (int): Maximum length of a chunk
+        first_max_chars (int): Maximum length of the first chunk
+
+    Returns:
+        list: The chunks, in order
+    """
+    sentences = [s.strip() for s in _SENTENCE_END.split(text or "") if s and s.strip()]
+
+    chunks = []
+    pending = ""
+    for sentence in sentences:
+        pending = f"{pending} {sentence}".strip() if pending else sentence
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ""
+    if pending:
+        chunks.append(pending)
+
+    result = []
+    for chunk in chunks:
+        limit = first_max_chars if not result else max_chars
+        while len(chunk) > limit:
+            head, chunk = _cut(chunk, limit)
+            result.append(head)
+            limit = max_chars
+        if chunk:
+            result.append(chunk)
+    return result
+
+
+def _cut(text, limit):
+    """Cut text at the last clause boundary (or space) before limit."""
+    window = text[:limit]
+    cut = -1
+    for match in _CLAUSE_END.finditer(window):
+        cut = match.start()
+    if cut <= 0:
+        cut = window.rfind(" ")
+    if cut <= 0:
+        cut = limit
+    return text[:cut].strip(), text[cut:].strip()
+
+
+def gtts_synthesize(text, lang="vi", slow=False):
+    """
+    Synthesize text with Google Text-to-Speech and return the MP3 bytes.
+
+    Args:
+        text (str): The text to convert to speech
+        lang (str): Language code (default: 'vi' for Vietnamese)
+        slow (bool): Whether to speak slowly
+    """
+    import gtts
+
+    buffer = io.BytesIO()
+    gtts.gTTS(text=text, lang=lang, slow=slow).write_to_fp(buffer)
+    return buffer.getvalue()
+
+
+class Mpg123Player:
+    """
+    Plays a sequence of MP3 chunks through one mpg123 process reading stdin.
+
+    Chunks written back to back decode as one continuous stream, so there is
+    no gap (and no process start-up) between sentences.
+    """
+
+    def __init__(self, command=None):
+        self.command = command or ["mpg123", "-q", "-"]
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def feed(self, data):
+        """Write one MP3 chunk to the player (blocks while the pipe is full)."""
+        try:
+            self.process.stdin.write(data)
+            self.process.stdin.flush()
+        except (BrokenPipeError, ValueError, OSError):
+            pass
+
+    def finish(self):
+        """Signal end of input and wait until everything has been played."""
+        try:
+            self.process.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        return self.process.wait()
+
+    def stop(self):
+        """Stop playback immediately."""
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+
+
+def decode_mp3(data, sample_rate=24000):
+    """
+    Decode MP3 bytes (or WAV, e.g. from the espeak backend) to mono int16
+    PCM at sample_rate (requires miniaudio).
+    """
+    import numpy as np
+
+    miniaudio = require("miniaudio", "MP3 decoding (--pcm-player)")
+
+    decoded = miniaudio.decode(
+        data,
+        output_format=miniaudio.SampleFormat.SIGNED16,
+        nchannels=1,
+        sample_rate=sample_rate,
+    )
+    return np.frombuffer(decoded.samples, dtype=np.int16)
+
+
+class PcmPlayer:
+    """
+    Long-lived in-process player: MP3 chunks are decoded in memory and
+    played from a queue through one sounddevice output stream that stays
+    open for the whole session (no process or file per utterance).
+
+    It has the Mpg123Player interface, so one instance can be shared by
+    every SpeechPipeline (player_factory=lambda: player). stop() silences
+    the output within one audio block and keeps the stream open.
+
+    Args:
+        sample_rate (int): Output rate (gTTS produces 24 kHz audio)
+        max_buffered (float): feed() blocks while more than this many
+            seconds are queued, so synthesis does not run far ahead
+        device: Output device (default: system default)
+    """
+
+    def __init__(self, sample_rate=24000, max_buffered=5.0, device=None):
+        self.sample_rate = sample_rate
+        self.max_buffered = max_buffered
+        self.device = device
+        self.stream = None
+        self.played = 0
+        self._chunks = collections.deque()
+        self._offset = 0
+        self._queued = 0
+        self._stopped = False
+        self._cond = threading.Condition()
+
+    def start(self):
+        """Begin a new utterance (opens the output stream the first time)."""
+        with self._cond:
+            self._chunks.clear()
+            self._offset = 0
+            self._queued = 0
+            self._stopped = False
+            self.played = 0
+        if self.stream is None:
+            sd = require("sounddevice", "--pcm-player")
+            self.stream = sd.OutputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype="int16",
+                latency="low",
+                device=self.device,
+                callback=self._callback,
+            )
+            self.stream.start()
+
+    @property
+    def position(self):
+        """Seconds of the current utterance heard so far."""
+        latency = self.stream.latency if self.stream is not None else 0.0
+        return max(0.0, self.played / self.sample_rate - latency)
+
+    @property
+    def buffered(self):
+        """Seconds queued and not played yet."""
+        return self._queued / self.sample_rate
+
+    def feed(self, data):
+        """Decode one MP3 chunk and queue it (blocks while max_buffered is queued)."""
+        samples = decode_mp3(data, self.sample_rate)
+        with self._cond:
+            while not self._stopped and self._queued > self.max_buffered * self.sample_rate:
+                self._cond.wait(0.1)
+            if self._stopped or samples.size == 0:
+                return
+            self._chunks.append(samples)
+            self._queued += samples.size
+
+    def finish(self):
+        """Wait until everything queued has been played."""
+        with self._cond:
+            while self._chunks and not self._stopped:
+                self._cond.wait(0.1)
+            stopped = self._stopped
+        if not stopped and self.stream is not None:
+            # The last block is still in the device buffer
+            time.sleep(self.stream.latency)
+        return 0
+
+    def stop(self):
+        """Drop the queued audio: the output is silent from the next block."""
+        with self._cond:
+            self._stopped = True
+            self._chunks.clear()
+            self._offset = 0
+            self._queued = 0
+            self._cond.notify_all()
+
+    def close(self):
+        """Stop playback and close the output stream."""
+        self.stop()
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def _callback(self, outdata, frames, time_info, status):
+        out = outdata[:, 0]
+        filled = 0
+        with self._cond:
+            while filled < frames and self._chunks:
+                chunk = self._chunks[0]
+                n = min(frames - filled, chunk.size - self._offset)
+                out[filled:filled + n] = chunk[self._offset:self._offset + n]
+                filled += n
+                self._offset += n
+                if self._offset == chunk.size:
+                    self._chunks.popleft()
+                    self._offset = 0
+            self._queued -= filled
+            self.played += filled
+            if filled:
+                self._cond.notify_all()
+        out[filled:] = 0
+
+
+class SpeechPipeline:
+    """
+    Synthesize and play sentences concurrently.
+
+    A synthesis thread turns queued sentences into audio and a playback
+    thread hands the audio to the player, so sentence N plays while sentence
+    N+1 is being synthesized. Sentences can be fed all at once (speak) or one
+    by one as they become available (feed / close).
+
+    Args:
+        synthesize (callable): Function text -> audio bytes
+        player_factory (callable): Function returning a new player
+        lookahead (int): How many synthesized chunks may wait for playback
+    """
+
+    def __init__(self, synthesize, player_factory=Mpg123Player, lookahead=2):
+        self.synthesize = synthesize
+        self.player_factory = player_factory
+        self.lookahead = lookahead
+        self.player = None
+        self.stopped = threading.Event()
+        self.errors = []
+        self.started_at = None
+        self.first_audio_at = None
+        self._text_queue = queue.Queue()
+        self._audio_queue = queue.Queue(maxsize=lookahead)
+        self._threads = []
+
+    @property
+    def time_to_first_audio(self):
+        """Seconds between start() and the first chunk reaching the player."""
+        if self.started_at is None or self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.started_at
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.player = self.player_factory()
+        self.player.start()
+        self._threads = [
+            threading.Thread(target=self._synthesis_loop, daemon=True),
+            threading.Thread(target=self._playback_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def feed(self, sentence):
+        """Queue one sentence for synthesis."""
+        if sentence and sentence.strip() and not self.stopped.is_set():
+            self._text_queue.put(sentence.strip())
+
+    def close(self):
+        """Signal that no more sentences will be fed."""
+        self._text_queue.put(_END_OF_STREAM)
+
+    def speak(self, text, **split_options):
+        """Split text into sentences, feed them all and wait for playback."""
+        for sentence in split_sentences(text, **split_options):
+            self.feed(sentence)
+        self.close()
+        self.wait()
+
+    def wait(self):
+        """Block until all queued audio has been played (or stop() is called)."""
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(timeout=0.1)
+
+    def stop(self):
+        """Stop synthesis and playback immediately."""
+        self.stopped.set()
+        if self.player:
+            self.player.stop()
+        # Unblock both threads
+        self._text_queue.put(_END_OF_STREAM)
+        try:
+            self._audio_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _synthesis_loop(self):
+        while not self.stopped.is_set():
+            sentence = self._text_queue.get()
+            if sentence is _END_OF_STREAM:
+                break
+            try:
+                audio = self.synthesize(sentence)
+            except Exception as e:
+                self.errors.append(e)
+                print(f"❌ Error in text-to-speech: {e}", file=sys.stderr)
+                continue
+            self._put_audio(audio)
+        self._put_audio(_END_OF_STREAM)
+
+    def _put_audio(self, item):
+        while not self.stopped.is_set():
+            try:
+                self._audio_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _playback_loop(self):
+        while not self.stopped.is_set():
+            try:
+                audio = self._audio_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if audio is _END_OF_STREAM:
+                break
+            if self.first_audio_at is None:
+                self.first_audio_at = time.perf_counter()
+            self.player.feed(audio)
+        if not self.stopped.is_set():
+            self.player.finish()
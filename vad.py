@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - voice activity detection and endpointing
+# Audio callbacks write into a preallocated int16 ring buffer (no per-callback
+# list of copies). Complete frames are classified as speech or silence with a
+# NumPy-vectorized frame energy / zero-crossing detector against an adaptive
+# noise floor, and end-of-speech is signalled through a threading.Event
+# instead of being polled.
+
+import threading
+
+import numpy as np
+
+
+def frame_features(frames):
+    """
+    Per-frame RMS energy and zero-crossing rate.
+
+    Args:
+        frames (np.ndarray): int16 array of shape (n_frames, frame_length)
+
+    Returns:
+        tuple: (energy, zcr), two float32 arrays of length n_frames
+    """
+    x = frames.astype(np.float32)
+    energy = np.sqrt(np.mean(x * x, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / np.float32(frames.shape[1] - 1)
+    return energy, zcr.astype(np.float32)
+
+
+class RingBuffer:
+    """
+    Fixed-size int16 ring buffer indexed by absolute sample position.
+
+    Args:
+        capacity (int): Number of samples kept
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.data = np.zeros(self.capacity, dtype=np.int16)
+        self.written = 0
+
+    @property
+    def start(self):
+        """Absolute position of the oldest sample still in the buffer."""
+        return max(0, self.written - self.capacity)
+
+    def write(self, samples):
+        """Copy samples in (at most two slice copies, no allocation)."""
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        offset = self.written % self.capacity
+        first = min(n, self.capacity - offset)
+        self.data[offset:offset + first] = samples[:first]
+        if first < n:
+            self.data[:n - first] = samples[first:]
+        self.written += n
+
+    def views(self, start, end):
+        """Return the samples [start, end) as one or two array views."""
+        start = max(start, self.start)
+        if end <= start:
+            return []
+        a = start % self.capacity
+        b = a + (end - start)
+        if b <= self.capacity:
+            return [self.data[a:b]]
+        return [self.data[a:], self.data[:b - self.capacity]]
+
+    def read(self, start, end):
+        """Return a contiguous copy of the samples [start, end)."""
+        views = self.views(start, end)
+        if not views:
+            return np.zeros(0, dtype=np.int16)
+        return np.concatenate(views) if len(views) > 1 else views[0].copy()
+
+
+class VADEndpointer:
+    """
+    Energy / zero-crossing endpointer fed from an audio callback.
+
+    Call process() with each block from the input stream; speech_started and
+    speech_ended are Events the main thread can wait on.
+
+    Args:
+        sample_rate (int): Sample rate of the audio
+        frame_ms (int): Analysis frame length in milliseconds
+        max_duration (float): Capacity of the ring buffer in seconds; the
+            endpointer also ends the utterance when it is reached
+        silence_duration (float): Silence after speech that ends the utterance
+        min_speech (float): Speech needed before an onset is declared
+        start_timeout (float): End the capture if no speech starts in time
+        energy_ratio (float): Speech must be this many times the noise floor
+        min_energy (float): Absolute energy floor for speech
+        zcr_max (float): Frames with a higher zero-crossing rate are noise
+        noise_adaptation (float): Noise floor update rate per non-speech frame
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, max_duration=10, silence_duration=1.0,
+                 min_speech=0.1, start_timeout=None, energy_ratio=3.0, min_energy=100.0,
+                 zcr_max=0.5, noise_adaptation=0.05):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        # A frame-aligned capacity keeps every frame contiguous in the ring
+        frames = int(np.ceil(max_duration * sample_rate / self.frame_length))
+        self.buffer = RingBuffer(frames * self.frame_length)
+        self.max_samples = int(max_duration * sample_rate)
+        self.silence_frames = int(np.ceil(silence_duration * 1000 / frame_ms))
+        self.speech_frames_needed = max(1, int(np.ceil(min_speech * 1000 / frame_ms)))
+        self.start_timeout_samples = int(start_timeout * sample_rate) if start_timeout else None
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.zcr_max = zcr_max
+        self.noise_adaptation = noise_adaptation
+        self.speech_started = threading.Event()
+        self.speech_ended = threading.Event()
+        self.noise_floor = None
+        self.reset()
+
+    def reset(self):
+        """Prepare for a new utterance (the noise floor is kept)."""
+        self.buffer.written = 0
+        self.processed = 0
+        self.speech_run = 0
+        self.silence_run = 0
+        self.onset = None
+        self.end = None
+        self.end_reason = None
+        self.speech_started.clear()
+        self.speech_ended.clear()
+
+    @property
+    def threshold(self):
+        """Current speech energy threshold."""
+        if self.noise_floor is None:
+            return self.min_energy
+        return max(self.min_energy, self.noise_floor * self.energy_ratio)
+
+    def process(self, samples):
+        """
+        Feed one block of int16 mono samples (safe to call from a callback).
+        """
+        if self.speech_ended.is_set():
+            return
+        self.buffer.write(samples)
+        available = (self.buffer.written - self.processed) // self.frame_length
+        if available <= 0:
+            return
+        end = self.processed + available * self.frame_length
+        for view in self.buffer.views(self.processed, end):
+            self._classify(view.reshape(-1, self.frame_length))
+            if self.speech_ended.is_set():
+                return
+            self.processed += len(view)
+
+        if self.buffer.written >= self.max_samples:
+            self._finish(self.buffer.written, "max_duration")
+        elif (not self.speech_started.is_set() and self.start_timeout_samples is not None
+              and self.buffer.written >= self.start_timeout_samples):
+            self._finish(self.buffer.written, "no_speech")
+
+    def _classify(self, frames):
+        energy, zcr = frame_features(frames)
+        if self.noise_floor is None:
+            # First frames: start from the quietest one
+            self.noise_floor = float(energy.min())
+
+        loud = energy > self.threshold
+        is_speech = loud & (zcr < self.zcr_max)
+        # Loud frames rejected only by the ZCR test (fricatives, breath) are not noise
+        self._adapt_noise_floor(energy[~loud])
+        self._update_state(is_speech)
+
+    def _adapt_noise_floor(self, noise):
+        """Exponential moving average over the non-speech frames, vectorized."""
+        k = noise.size
+        if k == 0:
+            return
+        a = self.noise_adaptation
+        weights = a * (1 - a) ** np.arange(k - 1, -1, -1, dtype=np.float64)
+        self.noise_floor = float(self.noise_floor * (1 - a) ** k + np.dot(weights, noise))
+
+    def _update_state(self, is_speech):
+        """Run the onset / end-of-speech state machine over the frame decisions."""
+        n = is_speech.size
+        # Position of each frame inside its run of speech / silence
+        changes = np.flatnonzero(np.diff(is_speech.astype(np.int8))) + 1
+        bounds = np.concatenate(([0], changes, [n]))
+        base = self.processed // self.frame_length
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            length = stop - start
+            if is_speech[start]:
+                self.silence_run = 0
+                self.speech_run += length
+                if not self.speech_started.is_set() and self.speech_run >= self.speech_frames_needed:
+                    onset_frame = base + stop - self.speech_run
+                    self.onset = max(0, onset_frame) * self.frame_length
+                    self.speech_started.set()
+            else:
+                self.speech_run = 0
+                self.silence_run += length
+                if self.speech_started.is_set() and self.silence_run >= self.silence_frames:
+                    end_frame = base + stop - (self.silence_run - self.silence_frames)
+                    self._finish(end_frame * self.frame_length, "silence")
+                    return
+
+    def _finish(self, end, reason):
+        self.end = end
+        self.end_reason = reason
+        self.speech_ended.set()
+
+    def wait(self, timeout=None):
+        """Block until the utterance has ended. Returns False on timeout."""
+        return self.speech_ended.wait(timeout)
+
+    def audio(self, pre_roll=None):
+        """
+        Return the captured audio as a contiguous int16 array.
+
+        Args:
+            pre_roll (float): If given, drop audio more than this many seconds
+                before the speech onset
+        """
+        start = self.buffer.start
+        if pre_roll is not None and self.onset is not None:
+            start = max(start, self.onset - int(pre_roll * self.sample_rate))
+        end = self.end if self.end is not None else self.buffer.written
+        return self.buffer.read(start, end)
@@ -0,0 +1,452 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - multi-session voice server
+# One asyncio process serves many users over HTTP. Each session has its own
+# user id, chat history and audio (nothing is shared through module globals
+# or output.mp3). The blocking SDK calls of a turn (speech recognition,
+# memory search, Gemini, gTTS) run on a shared thread pool, and each service
+# has a limit on concurrent requests, so the clients and their connection
+# pools are shared by all sessions. Turns of different sessions run
+# concurrently; turns of one session run in order.
+#
+# API (JSON unless noted):
+#   POST   /sessions                     {"user_id"?, "tts"?}  -> {"session", "user_id", "tts"}
+#   POST   /sessions/<id>/turns          {"text"} or a WAV body (Content-Type: audio/wav)
+#                                        -> {"turn", "transcript", "reply", "audio_url", "timings"}
+#   GET    /sessions/<id>/audio/<turn>   -> the audio of the reply (MP3, or WAV with "tts": "espeak")
+#   POST   /sessions/<id>/cancel         stop the running turn (it answers 409)
+#   DELETE /sessions/<id>
+#   GET    /stats
+#
+# Usage:
+#   python voice_server.py [--host 127.0.0.1] [--port 8765] [--local-memory] [--trace]
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import io
+import json
+import os
+import time
+import uuid
+
+from llm_stream import clean_text
+from prompt_builder import PromptBuilder, build_persona
+from tracing import Tracer, DEFAULT_TRACE_FILE
+from tts_backends import get_backend
+
+DEFAULT_MODEL = 'models/gemini-2.5-flash-preview-04-17'
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HttpError(Exception):
+    """An error answered to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_request(reader):
+    """
+    Read one HTTP/1.1 request.
+
+    Returns:
+        tuple: (method, path, headers, body), or None when the client closed
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+def write_response(writer, status, body=b"", content_type="application/json", keep_alive=True):
+    """Write one HTTP/1.1 response; dict bodies are sent as JSON."""
+    if isinstance(body, dict):
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+class Session:
+    """
+    State of one conversation: nothing here is shared with other sessions.
+
+    Args:
+        user_id (str): Owner of the memories searched and written
+        tts: TTS backend speaking the replies of this session
+        history_turns (int): Chat turns kept for the prompt
+        audio_turns (int): Replies whose audio can still be downloaded
+        tracer (Tracer): Per-session tracer (disabled when tracing is off)
+    """
+
+    def __init__(self, user_id, tts, history_turns=3, audio_turns=4, tracer=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.user_id = user_id or self.id
+        self.tts = tts
+        self.history = collections.deque(maxlen=history_turns)
+        self.audio = collections.OrderedDict()
+        self.audio_turns = audio_turns
+        self.turns = 0
+        self.task = None
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.tracer = tracer or Tracer(None)
+
+
+class VoiceServer:
+    """
+    Serve voice or text turns of many sessions concurrently.
+
+    Args:
+        memory: Memory client shared by all sessions (mem0 MemoryClient or LocalMemory)
+        genai_module: The `google.generativeai` module, or a local stand-in of it
+        persona (str): Static system prompt
+        workers (int): Threads running the blocking SDK calls
+        limits (dict): Maximum concurrent requests per service
+            ("asr", "memory", "llm", "tts")
+        max_sessions (int): Sessions kept at the same time
+        session_ttl (float): Idle seconds after which a session is dropped
+        max_tokens (int): Prompt token budget
+        trace_path (str): JSONL trace file (None: no tracing)
+        default_tts (str): TTS backend of sessions that do not choose one
+    """
+
+    def __init__(self, memory, genai_module, persona, workers=64, limits=None, max_sessions=1000,
+                 session_ttl=1800.0, max_tokens=2000, trace_path=None, default_tts="gtts"):
+        self.memory = memory
+        self.model = genai_module.GenerativeModel(DEFAULT_MODEL)
+        self.prompt_builder = PromptBuilder(persona, max_tokens=max_tokens, verbose=False)
+        self.executor = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="voice")
+        self.limits = dict({"asr": 16, "memory": 32, "llm": 32, "tts": 32}, **(limits or {}))
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.trace_path = trace_path
+        self.default_tts = default_tts
+        self.tts_backends = {}
+        self.sessions = {}
+        self.turns = 0
+        self.errors = 0
+        self.active_turns = 0
+        self.server = None
+        self._semaphores = {}
+        self._writes = set()
+        self._recognizer = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """Start listening; port 0 picks a free port (see .port)."""
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        self.server = await asyncio.start_server(self._handle_connection, host, port, backlog=1024)
+        return self
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop accepting connections and wait for the pending memory writes."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+    # --- HTTP ---------------------------------------------------------------
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as e:
+                    write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload, content_type = await self._route(method, path, headers, body)
+                except HttpError as e:
+                    status, payload, content_type = e.status, {"error": str(e)}, "application/json"
+                except Exception as e:
+                    self.errors += 1
+                    print(f"❌ Error processing request: {e}")
+                    status, payload, content_type = 500, {"error": str(e)}, "application/json"
+                write_response(writer, status, payload, content_type, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, headers, body):
+        parts = [part for part in path.split("/") if part]
+        if parts == ["stats"] and method == "GET":
+            return 200, self.stats(), "application/json"
+        if parts == ["sessions"] and method == "POST":
+            data = self._json(body) if body else {}
+            session = self.create_session(data.get("user_id"), data.get("tts"))
+            return 201, {"session": session.id, "user_id": session.user_id, "tts": session.tts.name}, "application/json"
+        if len(parts) < 2 or parts[0] != "sessions":
+            raise HttpError(404, f"no route for {path}")
+
+        session = self.sessions.get(parts[1])
+        if session is None:
+            raise HttpError(404, f"unknown session {parts[1]}")
+        session.last_used = time.monotonic()
+        action = parts[2:]
+        if action == [] and method == "DELETE":
+            self.end_session(session)
+            return 204, b"", "application/json"
+        if action == ["turns"] and method == "POST":
+            if headers.get("content-type", "").startswith("audio/"):
+                return 200, await self.turn(session, audio=body), "application/json"
+            text = str(self._json(body).get("text", "")).strip()
+            if not text:
+                raise HttpError(400, "send {\"text\": ...} or a WAV body")
+            return 200, await self.turn(session, text=text), "application/json"
+        if action == ["cancel"] and method == "POST":
+            cancelled = session.task is not None and not session.task.done()
+            if cancelled:
+                session.task.cancel()
+            return 200, {"cancelled": cancelled}, "application/json"
+        if len(action) == 2 and action[0] == "audio" and method == "GET":
+            audio = session.audio.get(action[1])
+            if audio is None:
+                raise HttpError(404, f"no audio for turn {action[1]}")
+            return 200, audio, session.tts.content_type
+        raise HttpError(405, f"{method} not allowed on {path}")
+
+    @staticmethod
+    def _json(body):
+        try:
+            data = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise HttpError(400, "invalid JSON body")
+        if not isinstance(data, dict):
+            raise HttpError(400, "the JSON body must be an object")
+        return data
+
+    # --- Sessions -----------------------------------------------------------
+
+    def tts_backend(self, name=None):
+        """The shared instance of a TTS backend (created on first use)."""
+        name = name or self.default_tts
+        if name not in self.tts_backends:
+            try:
+                self.tts_backends[name] = get_backend(name)
+            except (ValueError, RuntimeError) as e:
+                raise HttpError(400, str(e))
+        return self.tts_backends[name]
+
+    def create_session(self, user_id=None, tts=None):
+        """Open a session (idle sessions past session_ttl are dropped first)."""
+        now = time.monotonic()
+        for session in list(self.sessions.values()):
+            if now - session.last_used > self.session_ttl and not session.lock.locked():
+                self.end_session(session)
+        if len(self.sessions) >= self.max_sessions:
+            raise HttpError(503, f"{self.max_sessions} sessions already open")
+        tracer = Tracer(self.trace_path) if self.trace_path else None
+        session = Session(user_id, self.tts_backend(tts), tracer=tracer)
+        session.tracer.session = session.id
+        self.sessions[session.id] = session
+        return session
+
+    def end_session(self, session):
+        if session.task is not None:
+            session.task.cancel()
+        self.sessions.pop(session.id, None)
+
+    def stats(self):
+        return {
+            "sessions": len(self.sessions),
+            "turns": self.turns,
+            "active_turns": self.active_turns,
+            "errors": self.errors,
+            "pending_writes": len(self._writes),
+        }
+
+    # --- Turns --------------------------------------------------------------
+
+    async def turn(self, session, text=None, audio=None):
+        """Run one turn of a session after the previous one has finished."""
+        async with session.lock:
+            session.task = asyncio.ensure_future(self._run_turn(session, text, audio))
+            try:
+                return await session.task
+            except asyncio.CancelledError:
+                session.tracer.end_turn(result="cancelled")
+                raise HttpError(409, "turn cancelled")
+            finally:
+                session.task = None
+
+    async def _run_turn(self, session, text, audio):
+        tracer = session.tracer
+        tracer.start_turn(input="voice" if audio is not None else "text")
+        timings = {}
+        self.active_turns += 1
+        try:
+            if audio is not None:
+                text = await self._call("asr", "asr", timings, tracer, self._recognize, audio)
+                if not text:
+                    tracer.end_turn(result="no_input")
+                    raise HttpError(400, "could not understand the audio")
+
+            results = await self._call("memory", "retrieval", timings, tracer, self.memory.search,
+                                       query=text, user_id=session.user_id, limit=5, output_format="v1.1")
+            prompt = self.prompt_builder.build(text, memories=results["results"], history=list(session.history))
+            response = await self._call("llm", "llm", timings, tracer, self.model.generate_content, prompt.text)
+            reply = clean_text(response.text.strip())
+            speech = await self._call("tts", "tts_synthesis", timings, tracer, session.tts.synthesize, reply)
+
+            session.turns += 1
+            turn = str(session.turns)
+            session.history.append({"user": text, "gemini": reply})
+            session.audio[turn] = speech
+            while len(session.audio) > session.audio_turns:
+                session.audio.popitem(last=False)
+            self.turns += 1
+            self._remember(session.user_id, text, reply)
+            tracer.end_turn(prompt_tokens=prompt.tokens)
+            return {
+                "turn": session.turns,
+                "transcript": text,
+                "reply": reply,
+                "audio_url": f"/sessions/{session.id}/audio/{turn}",
+                "timings": timings,
+            }
+        except Exception as e:
+            tracer.end_turn(result="error", error=str(e))
+            raise
+        finally:
+            self.active_turns -= 1
+
+    async def _call(self, service, stage, timings, tracer, func, *args, **kwargs):
+        """Run a blocking call on the pool, within the concurrency limit of its service."""
+        start = time.perf_counter()
+        async with self._semaphores[service]:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.executor, lambda: func(*args, **kwargs))
+        end = time.perf_counter()
+        timings[stage] = round(end - start, 4)
+        tracer.record(stage, start, end)
+        return result
+
+    def _recognize(self, wav_bytes):
+        import speech_recognition as sr
+
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        try:
+            with sr.AudioFile(io.BytesIO(wav_bytes)) as source:
+                audio = self._recognizer.record(source)
+            return self._recognizer.recognize_google(audio, language="vi-VN").strip()
+        except sr.UnknownValueError:
+            return ""
+        except ValueError as e:
+            raise HttpError(400, f"unreadable audio: {e}")
+
+    def _remember(self, user_id, text, reply):
+        """Write the turn to memory in the background: the reply does not wait for it."""
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, lambda: self.memory.add([
+            {"role": "user", "content": text},
+            {"role": "assistant", "content": reply},
+        ], user_id=user_id, output_format="v1.1"))
+        self._writes.add(future)
+        future.add_done_callback(self._writes.discard)
+        future.add_done_callback(self._report_write)
+
+    @staticmethod
+    def _report_write(future):
+        """Log a failed memory write; nobody else awaits the future."""
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ Memory write failed: {future.exception()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-session voice chatbot server")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SERVER_WORKERS", "64")),
+                        help="Threads running the blocking SDK calls")
+    parser.add_argument("--local-memory", action="store_true", help="Use the embedded memory store")
+    parser.add_argument("--trace", action="store_true", help="Record per-turn spans to $TRACE_FILE")
+    parser.add_argument("--tts", default="gtts", help="TTS backend of sessions that do not choose one (gtts, espeak)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path="gemini_audio_chatbot/.env")
+    import google.generativeai as genai
+    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+
+    if args.local_memory:
+        from local_memory import LocalMemory, DEFAULT_MEMORY_DIR
+        memory = LocalMemory(os.getenv("LOCAL_MEMORY_DIR", DEFAULT_MEMORY_DIR))
+    else:
+        from mem0 import MemoryClient
+        memory = MemoryClient()
+
+    personal_data = {"name": "Mai", "age": "18", "hometown": "Cần Thơ"}
+    path = os.getenv("PERSONAL_DATA_PATH", "gemini_audio_chatbot/personal_data.json")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            personal_data = json.load(f)
+
+    server = VoiceServer(
+        memory,
+        genai,
+        build_persona(personal_data),
+        workers=args.workers,
+        max_tokens=int(os.getenv("PROMPT_MAX_TOKENS", "2000")),
+        trace_path=os.getenv("TRACE_FILE", DEFAULT_TRACE_FILE) if args.trace else None,
+        default_tts=args.tts,
+    )
+
+    async def serve():
+        await server.start(args.host, args.port)
+        print(f"🚀 Voice server listening on http://{args.host}:{server.port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - wake phrases ("Mai ơi") in transcripts
+# Standard library only, so the chatbots can strip the wake phrase from a
+# recognized utterance without loading NumPy or the keyword spotter.
+
+import unicodedata
+
+WAKE_PHRASES = ("mai ơi", "mai oi", "ê mai", "này mai")
+
+
+def normalize_phrase(text):
+    """Lower-case text without diacritics or punctuation ("Mai ơi," -> "mai oi")."""
+    text = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    text = "".join(c if c.isalnum() else " " for c in text)
+    return " ".join(text.split())
+
+
+def strip_wake_word(text, phrases=WAKE_PHRASES):
+    """
+    Remove a leading wake phrase from a transcript.
+
+    Args:
+        text (str): The recognized utterance, e.g. "Mai ơi, mấy giờ rồi?"
+        phrases (tuple): Wake phrases, compared without diacritics
+
+    Returns:
+        str: The rest of the utterance ("mấy giờ rồi?"), or text unchanged
+    """
+    words = text.split()
+    for phrase in phrases:
+        size = len(phrase.split())
+        if normalize_phrase(" ".join(words[:size])) == normalize_phrase(phrase):
+            return " ".join(words[size:]).lstrip(",.!?:;- ")
+    return text
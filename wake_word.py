@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+# JARVIS Voicebot - hands-free wake word ("Mai ơi")
+# The always-open microphone feeds a VAD endpointer: a vectorized frame
+# energy gate against the adaptive noise floor, a few microseconds per chunk,
+# so idle listening costs next to no CPU. Only when the gate opens on speech
+# is the keyword spotter run, once, on the first second of that speech. When
+# it accepts, the endpointer keeps recording until the user stops, and the
+# buffered utterance ("Mai ơi, hôm nay trời thế nào?") goes to recognition
+# without the microphone being reopened.
+#
+# Spotters:
+#   TemplateSpotter    MFCC + subsequence DTW against a few enrolled
+#                      recordings of the wake word (NumPy only)
+#   TranscriptSpotter  the local wav2vec2 recognizer (--local-asr) on the
+#                      short window, matched against the wake phrases
+#
+# Enroll the templates (records a few repetitions to wake_word/):
+#   python wake_word.py --enroll [--count 4] [--dir wake_word]
+
+import argparse
+import glob
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+from vad import VADEndpointer
+from wake_phrases import WAKE_PHRASES, strip_wake_word
+
+DEFAULT_TEMPLATE_DIR = "wake_word"
+
+
+def _mel_filterbank(n_mels, n_fft, sample_rate):
+    """Triangular mel filters, shape (n_mels, n_fft // 2 + 1)."""
+    def to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def to_hz(m):
+        return 700.0 * (10 ** (m / 2595.0) - 1.0)
+
+    edges = to_hz(np.linspace(to_mel(20.0), to_mel(sample_rate / 2), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def _dct_matrix(n_out, n_in):
+    """Orthonormal DCT-II matrix, shape (n_out, n_in)."""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    matrix = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+_FEATURE_MATRICES = {}
+
+
+def mfcc(samples, sample_rate=16000, n_mfcc=13, n_mels=26, frame_ms=25, hop_ms=10, n_fft=512):
+    """
+    Mean-normalized MFCCs (without c0) scaled to unit length per frame, so
+    the dot product of two frames is their cosine similarity.
+
+    Args:
+        samples (np.ndarray): Mono int16 audio
+        sample_rate (int): Rate of samples
+
+    Returns:
+        np.ndarray: float32 array of shape (n_frames, n_mfcc - 1)
+    """
+    key = (sample_rate, n_mfcc, n_mels, n_fft)
+    if key not in _FEATURE_MATRICES:
+        _FEATURE_MATRICES[key] = (_mel_filterbank(n_mels, n_fft, sample_rate), _dct_matrix(n_mfcc, n_mels))
+    filterbank, dct = _FEATURE_MATRICES[key]
+
+    x = samples.astype(np.float32) / 32768.0
+    x = np.append(x[:1], x[1:] - 0.97 * x[:-1])  # pre-emphasis
+    frame = int(sample_rate * frame_ms / 1000)
+    hop = int(sample_rate * hop_ms / 1000)
+    if len(x) < frame:
+        x = np.pad(x, (0, frame - len(x)))
+    n_frames = 1 + (len(x) - frame) // hop
+    index = np.arange(frame)[None, :] + hop * np.arange(n_frames)[:, None]
+    frames = x[index] * np.hamming(frame).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2 / n_fft
+    coefficients = np.log(power @ filterbank.T + 1e-10) @ dct.T
+    coefficients = coefficients[:, 1:]  # c0 is the loudness
+    coefficients -= coefficients.mean(axis=0)
+    norms = np.linalg.norm(coefficients, axis=1, keepdims=True)
+    return (coefficients / np.maximum(norms, 1e-6)).astype(np.float32)
+
+
+def subsequence_dtw(template, segment):
+    """
+    Average frame distance of the best alignment of the whole template with
+    any part of the segment.
+
+    Each template frame advances the segment by 0, 1 or 2 frames, so the
+    spoken word may be up to twice as slow or much faster than the template,
+    and every row of the cost table is computed in one vectorized step.
+
+    Args:
+        template (np.ndarray): Unit-length feature frames, shape (n, d)
+        segment (np.ndarray): Unit-length feature frames, shape (m, d)
+
+    Returns:
+        float: Mean cosine distance along the path (0: identical)
+    """
+    cost = 1.0 - template @ segment.T
+    total = cost[0].copy()  # the word may start anywhere in the segment
+    for row in cost[1:]:
+        best = total.copy()
+        best[1:] = np.minimum(best[1:], total[:-1])
+        best[2:] = np.minimum(best[2:], total[:-2])
+        total = row + best
+    return float(total.min()) / len(template)
+
+
+def read_wav(path):
+    """Mono int16 samples and the sample rate of a 16-bit WAV file."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit PCM")
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        if f.getnchannels() > 1:
+            samples = samples.reshape(-1, f.getnchannels()).mean(axis=1).astype(np.int16)
+        return samples, f.getframerate()
+
+
+class TemplateSpotter:
+    """
+    Keyword spotter matching the speech against enrolled recordings of the
+    wake word with MFCC features and subsequence DTW.
+
+    Args:
+        templates (list): Mono int16 recordings of the wake word, trimmed to the speech
+        sample_rate (int): Rate of the templates and of the audio to spot in
+        threshold (float): Maximum distance accepted; by default a margin
+            above the largest distance between two templates, between 0.2
+            and 0.6 (0.4 for a single template)
+    """
+
+    def __init__(self, templates, sample_rate=16000, threshold=None):
+        if not templates:
+            raise ValueError("no wake word templates")
+        self.sample_rate = sample_rate
+        self.templates = [mfcc(t, sample_rate) for t in templates]
+        # Audio needed after the speech onset: the longest template plus slack
+        self.window = max(len(t) for t in templates) / sample_rate * 1.3 + 0.2
+        if threshold is None:
+            pairs = [subsequence_dtw(a, b) for i, a in enumerate(self.templates)
+                     for j, b in enumerate(self.templates) if i != j]
+            threshold = min(0.6, max(0.2, 1.25 * max(pairs))) if pairs else 0.4
+        self.threshold = threshold
+        self.last_score = None
+
+    @classmethod
+    def from_directory(cls, directory=DEFAULT_TEMPLATE_DIR, threshold=None):
+        """Load the templates enrolled as WAV files in directory."""
+        paths = sorted(glob.glob(os.path.join(directory, "*.wav")))
+        if not paths:
+            raise FileNotFoundError(
+                f"no wake word recordings in {directory}/ (run: python wake_word.py --enroll)")
+        recordings = [read_wav(path) for path in paths]
+        rates = {rate for _, rate in recordings}
+        if len(rates) > 1:
+            raise ValueError(f"wake word recordings in {directory}/ have different sample rates")
+        return cls([samples for samples, _ in recordings], sample_rate=rates.pop(), threshold=threshold)
+
+    def spot(self, samples):
+        """
+        Return True if the wake word is at the start of samples.
+
+        Args:
+            samples (np.ndarray): Mono int16 audio from just before the speech onset
+        """
+        segment = mfcc(samples, self.sample_rate)
+        self.last_score = min(subsequence_dtw(template, segment) for template in self.templates)
+        return self.last_score <= self.threshold
+
+
+class TranscriptSpotter:
+    """
+    Keyword spotter transcribing the short window with a local recognizer
+    and looking for a wake phrase at its start.
+
+    Args:
+        transcribe: Function (int16 samples, sample_rate) -> text, e.g.
+            Wav2Vec2Backend.transcribe
+        phrases (tuple): Accepted wake phrases
+        window (float): Seconds of speech transcribed after the onset
+        sample_rate (int): Rate of the audio to spot in
+    """
+
+    def __init__(self, transcribe, phrases=WAKE_PHRASES, window=1.5, sample_rate=16000):
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.phrases = phrases
+        self.window = window
+        self.last_score = None
+
+    def spot(self, samples):
+        text = self.transcribe(samples, self.sample_rate)
+        self.last_score = text
+        return strip_wake_word(text, self.phrases) != text
+
+
+def make_spotter(directory=DEFAULT_TEMPLATE_DIR, threshold=None, transcribe=None):
+    """
+    The enrolled templates when there are any, else the transcript spotter.
+
+    Args:
+        directory (str): Template directory
+        threshold (float): Template distance threshold (None: from the templates)
+        transcribe: Function (int16 samples, sample_rate) -> text of a local
+            recognizer, used when no templates are enrolled
+
+    Raises:
+        FileNotFoundError: If there are neither templates nor a recognizer
+    """
+    if transcribe is not None and not glob.glob(os.path.join(directory, "*.wav")):
+        return TranscriptSpotter(transcribe)
+    return TemplateSpotter.from_directory(directory, threshold=threshold)
+
+
+class WakeWordDetector:
+    """
+    Wait for the wake word on the always-open microphone and capture the
+    utterance it starts.
+
+    Args:
+        microphone (PersistentMicrophone): The open microphone (int16 mono)
+        spotter: TemplateSpotter or TranscriptSpotter
+        pre_roll (float): Seconds of audio kept from before the speech onset
+        min_speech (float): Speech needed before the gate opens
+        energy_ratio (float): Speech must be this many times the noise floor
+        silence_duration (float): Silence that ends the utterance
+        max_duration (float): Maximum length of the utterance
+        idle_window (float): Audio kept while nobody talks
+        sample_rate (int): Rate of the microphone; pass it when the
+            microphone is opened lazily (--fast-start)
+    """
+
+    def __init__(self, microphone, spotter, pre_roll=0.3, min_speech=0.1, energy_ratio=3.0,
+                 silence_duration=0.8, max_duration=10, idle_window=5.0, sample_rate=None):
+        self.microphone = microphone
+        self.spotter = spotter
+        self.sample_rate = sample_rate or microphone.sample_rate
+        self.pre_roll = pre_roll
+        self.max_duration = max_duration
+        self.idle_samples = int(idle_window * self.sample_rate)
+        self.window_samples = int(spotter.window * self.sample_rate)
+        self.endpointer = VADEndpointer(
+            sample_rate=self.sample_rate,
+            max_duration=idle_window + max_duration,
+            silence_duration=silence_duration,
+            min_speech=min_speech,
+            energy_ratio=energy_ratio,
+        )
+        self.candidate = threading.Event()
+        self.listened = 0
+        self.spotter_runs = 0
+        self.spotter_time = 0.0
+        self.detections = 0
+        self._state = "stopped"
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start watching the microphone (the noise floor is kept across turns)."""
+        with self._lock:
+            if self._state != "stopped":
+                return
+            self.endpointer.reset()
+            self.candidate.clear()
+            self._state = "idle"
+        self.microphone.add_listener(self._on_audio)
+
+    def stop(self):
+        """Stop watching, e.g. while the answer is being spoken."""
+        self.microphone.remove_listener(self._on_audio)
+        with self._lock:
+            self._state = "stopped"
+
+    def wait(self, timeout=None):
+        """
+        Block until the wake word has been spoken.
+
+        Args:
+            timeout (float): Seconds to wait (default: forever)
+
+        Returns:
+            bool: True when the wake word was detected, False on timeout
+        """
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if remaining <= 0:
+                return False
+            # Short waits keep Ctrl+C responsive
+            if not self.candidate.wait(remaining):
+                continue
+
+            with self._lock:
+                endpointer = self.endpointer
+                end = endpointer.end if endpointer.end is not None else endpointer.buffer.written
+                start = max(0, endpointer.onset - int(self.pre_roll * self.sample_rate))
+                samples = endpointer.buffer.read(start, min(end, endpointer.onset + self.window_samples))
+                self.candidate.clear()
+
+            started = time.perf_counter()
+            detected = self.spotter.spot(samples)
+            self.spotter_time += time.perf_counter() - started
+            self.spotter_runs += 1
+
+            with self._lock:
+                if detected:
+                    self._state = "detected"
+                    self.detections += 1
+                    return True
+                # Not the wake word: ignore the rest of this utterance
+                self._state = "rejected"
+                if endpointer.speech_ended.is_set():
+                    endpointer.reset()
+                    self._state = "idle"
+
+    def utterance(self, timeout=None):
+        """
+        Wait for the utterance started by the wake word to end and return it.
+        It may hold only the wake word when the user paused after it.
+
+        Args:
+            timeout (float): Seconds to wait (default: max_duration)
+
+        Returns:
+            sr.AudioData: The utterance, starting pre_roll seconds before its onset
+        """
+        import speech_recognition as sr
+
+        self.endpointer.wait(self.max_duration if timeout is None else timeout)
+        self.stop()
+        samples = self.endpointer.audio(pre_roll=self.pre_roll)
+        return sr.AudioData(samples.tobytes(), self.sample_rate, 2)
+
+    def _on_audio(self, buffer):
+        samples = np.frombuffer(buffer, dtype=np.int16)
+        with self._lock:
+            endpointer = self.endpointer
+            self.listened += len(samples)
+            if self._state == "idle":
+                if not endpointer.speech_started.is_set() and endpointer.buffer.written >= self.idle_samples:
+                    endpointer.reset()
+                endpointer.process(samples)
+                # Open the gate once enough speech for the spotter is buffered
+                if endpointer.speech_started.is_set() and (
+                        endpointer.speech_ended.is_set()
+                        or endpointer.buffer.written - endpointer.onset >= self.window_samples):
+                    self._state = "candidate"
+                    self.candidate.set()
+            elif self._state == "rejected":
+                endpointer.process(samples)
+                if endpointer.speech_ended.is_set():
+                    endpointer.reset()
+                    self._state = "idle"
+            elif self._state in ("candidate", "detected"):
+                # Keep recording while the spotter runs and after it accepts
+                endpointer.process(samples)
+
+    def report(self):
+        listened = self.listened / self.sample_rate
+        return (
+            f"👂 Wake word: {self.detections} detections, {self.spotter_runs} spotter runs "
+            f"({self.spotter_time * 1000:.0f} ms) in {listened:.0f} s of listening"
+        )
+
+
+def enroll(directory=DEFAULT_TEMPLATE_DIR, count=4, sample_rate=16000):
+    """
+    Record the wake word a few times and save the recordings, trimmed to
+    the speech, as WAV templates.
+
+    Args:
+        directory (str): Where the templates are written
+        count (int): Number of repetitions
+        sample_rate (int): Recording rate (the microphone rate used by the chatbot)
+    """
+    import speech_recognition as sr
+    from audio_preprocess import trim_silence
+
+    os.makedirs(directory, exist_ok=True)
+    r = sr.Recognizer()
+    first = len(glob.glob(os.path.join(directory, "*.wav")))
+    with sr.Microphone(sample_rate=sample_rate) as source:
+        print("🔊 Adjusting for ambient noise... Please wait...")
+        r.adjust_for_ambient_noise(source)
+        for i in range(count):
+            print(f"🗣️ Say \"Mai ơi\" ({i + 1}/{count})")
+            audio = r.listen(source, timeout=10, phrase_time_limit=3)
+            samples = np.frombuffer(audio.get_raw_data(convert_rate=sample_rate, convert_width=2), dtype=np.int16)
+            samples, _ = trim_silence(samples, sample_rate, padding=0.05)
+            path = os.path.join(directory, f"wake_{first + i:03d}.wav")
+            with wave.open(path, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(sample_rate)
+                f.writeframes(samples.tobytes())
+            print(f"✅ Saved {path} ({len(samples) / sample_rate:.2f} s)")
+
+    spotter = TemplateSpotter.from_directory(directory)
+    print(f"Threshold: {spotter.threshold:.3f} (set WAKE_WORD_THRESHOLD to override)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll or test the wake word")
+    parser.add_argument("--enroll", action="store_true", help="Record new wake word templates")
+    parser.add_argument("--count", type=int, default=4, help="Repetitions to record")
+    parser.add_argument("--dir", default=os.getenv("WAKE_WORD_DIR", DEFAULT_TEMPLATE_DIR),
+                        help="Template directory")
+    parser.add_argument("wav", nargs="*", help="Recordings to score against the templates")
+    args = parser.parse_args()
+
+    if args.enroll:
+        enroll(args.dir, args.count)
+        return
+    spotter = TemplateSpotter.from_directory(args.dir)
+    print(f"{len(spotter.templates)} templates, threshold {spotter.threshold:.3f}")
+    for path in args.wav:
+        samples, rate = read_wav(path)
+        if rate != spotter.sample_rate:
+            print(f"{path}: sample rate {rate} Hz, the templates are {spotter.sample_rate} Hz")
+            continue
+        detected = spotter.spot(samples)
+        print(f"{path}: distance {spotter.last_score:.3f} {'✅ wake word' if detected else '❌'}")
+
+
+if __name__ == "__main__":
+    main()